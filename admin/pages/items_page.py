@@ -285,7 +285,7 @@ class ItemsPage(ctk.CTkFrame):
                         "id": item.get("id"),
                         "name": item.get("name"),
                         "category": cats if cats else ["Other"],
-                        "price": float(item.get("price").replace("₹", "").strip()) if isinstance(item.get("price"), str) else float(item.get("price", 0)),
+                        "price": item["price_paise"] / 100 if item.get("price_paise") is not None else float(str(item.get("price", 0)).replace("₹", "").strip()),
                         "old_price": None,  # Optionally add old_price if backend supports
                         "image_name": item.get("image_name", "")
                     })
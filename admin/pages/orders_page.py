@@ -6,10 +6,13 @@ from utils.colors import COLORS
 from utils.widgets import Card
 
 class OrdersPage(ctk.CTkFrame):
+    PAGE_SIZE = 50
+
     def __init__(self, parent):
         super().__init__(parent, fg_color=COLORS["bg_main"])
         self.parent = parent
         self.orders = []
+        self.next_after_id = None  # Cursor for the next page of orders
         self.setup_header()
         self.setup_content()
         self.setup_footer()
@@ -65,20 +68,23 @@ class OrdersPage(ctk.CTkFrame):
     def display_orders(self, orders=None):
         for widget in self.rows_container.winfo_children():
             widget.destroy()
-        orders_to_display = orders or self.orders
+        orders_to_display = self.orders if orders is None else orders
         for order in orders_to_display:
-            row = ctk.CTkFrame(self.rows_container, fg_color=COLORS["card_bg"], corner_radius=8)
-            row.pack(fill="x", pady=2, padx=0)
-            items_text = ", ".join([f"{item['qty']}x {item['name']}" for item in order["items"]])
-            values = [order["id"], items_text, order.get("special_instructions", ""), f"₹{order['total']:.2f}"]
-            for idx, val in enumerate(values):
-                label = ctk.CTkLabel(row, text=val, font=ctk.CTkFont(size=13), text_color=COLORS["text_primary"])
-                label.grid(row=0, column=idx, padx=8, pady=8, sticky="nsew")
-                row.grid_columnconfigure(idx, weight=1)
-                # Make label clickable as well
-                label.bind("<Button-1>", lambda e, oid=order["id"]: self.show_order_details_by_id(oid))
-            # Make the whole row clickable on single click
-            row.bind("<Button-1>", lambda e, oid=order["id"]: self.show_order_details_by_id(oid))
+            self.add_order_row(order)
+
+    def add_order_row(self, order):
+        row = ctk.CTkFrame(self.rows_container, fg_color=COLORS["card_bg"], corner_radius=8)
+        row.pack(fill="x", pady=2, padx=0)
+        items_text = ", ".join([f"{item['qty']}x {item['name']}" for item in order["items"]])
+        values = [order["id"], items_text, order.get("special_instructions", ""), f"₹{order['total']:.2f}"]
+        for idx, val in enumerate(values):
+            label = ctk.CTkLabel(row, text=val, font=ctk.CTkFont(size=13), text_color=COLORS["text_primary"])
+            label.grid(row=0, column=idx, padx=8, pady=8, sticky="nsew")
+            row.grid_columnconfigure(idx, weight=1)
+            # Make label clickable as well
+            label.bind("<Button-1>", lambda e, oid=order["id"]: self.show_order_details_by_id(oid))
+        # Make the whole row clickable on single click
+        row.bind("<Button-1>", lambda e, oid=order["id"]: self.show_order_details_by_id(oid))
 
     def show_order_details_by_id(self, order_id):
         order = next((o for o in self.orders if o["id"] == order_id), None)
@@ -187,38 +193,61 @@ class OrdersPage(ctk.CTkFrame):
             height=40
         )
         refresh_btn.pack(side="left", padx=8)
-        
+        self.load_more_btn = ctk.CTkButton(
+            action_frame,
+            text="Load More",
+            command=self.load_more_orders,
+            fg_color=COLORS["primary"],
+            hover_color=COLORS["secondary"],
+            text_color="white",
+            font=ctk.CTkFont(size=15, weight="bold"),
+            corner_radius=10,
+            width=120,
+            height=40,
+            state="disabled"
+        )
+        self.load_more_btn.pack(side="left", padx=8)
 
-    def load_orders_from_api(self):
+    def load_orders_from_api(self, append=False):
+        """Fetch one page of orders, filtered on the server by payment status"""
+        params = {"limit": self.PAGE_SIZE}
+        filter_val = self.filter_var.get().strip().lower()
+        if filter_val != "all":
+            params["payment_status"] = filter_val
+        if append and self.next_after_id is not None:
+            params["after_id"] = self.next_after_id
         try:
-            resp = requests.get("http://127.0.0.1:5000/orders", timeout=5)
+            resp = requests.get("http://127.0.0.1:5000/orders", params=params, timeout=5)
             if resp.status_code == 200:
                 data = resp.json()
                 orders = data.get('orders', [])
-                self.orders = orders
-                self.apply_filters()
+                self.next_after_id = data.get('next_after_id')
+                if append:
+                    # Only render the new page instead of redrawing every row
+                    self.orders.extend(orders)
+                    for order in orders:
+                        self.add_order_row(order)
+                else:
+                    self.orders = orders
+                    self.display_orders()
+                self.load_more_btn.configure(state="normal" if self.next_after_id is not None else "disabled")
+                self.update_idletasks()
             else:
                 ctk.CTkMessagebox.show_error("Error", f"Failed to fetch orders: {resp.status_code}")
         except Exception as e:
             ctk.CTkMessagebox.show_error("Error", f"Request failed: {e}")
 
+    def load_more_orders(self):
+        if self.next_after_id is not None:
+            self.load_orders_from_api(append=True)
+
     def load_sample_orders(self):
         self.load_orders_from_api()
 
     def apply_filters(self):
-        filter_val = self.filter_var.get().strip().lower()
-        filtered = []
-        for order in self.orders:
-            # Normalize payment_status for robust comparison
-            status = str(order.get("payment_status", "unpaid")).strip().lower()
-            if filter_val == "all":
-                filtered.append(order)
-            elif filter_val == "paid" and status == "paid":
-                filtered.append(order)
-            elif filter_val == "unpaid" and status != "paid":
-                filtered.append(order)
-        self.display_orders(filtered)
-        self.update_idletasks()
+        # Filtering happens on the server, so restart from the first page
+        self.next_after_id = None
+        self.load_orders_from_api()
 
     def add_new_order(self):
         ctk.CTkMessagebox.show_info("Info", "Add new order functionality would be implemented here")
@@ -1,8 +1,8 @@
 import tkinter as tk
 from tkinter import ttk
 import datetime
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import calendar
+import requests
 from utils.colors import COLORS
 from utils.widgets import Card
 
@@ -10,26 +10,15 @@ class RevenuePage(tk.Frame):
     def __init__(self, parent):
         super().__init__(parent, bg=COLORS["bg_main"])
         
-        # Sample data for demonstration
-        self.monthly_revenue = {
-            "Jan": 45000, "Feb": 52000, "Mar": 48000,
-            "Apr": 51000, "May": 58000, "Jun": 62000,
-            "Jul": 57000, "Aug": 64000, "Sep": 67000,
-            "Oct": 72000, "Nov": 68000, "Dec": 78000
-        }
-        
-        self.daily_revenue = {
-            "Mon": 8500, "Tue": 7800, "Wed": 9200,
-            "Thu": 8900, "Fri": 10500, "Sat": 12000, "Sun": 11000
-        }
-        
-        self.category_sales = {
-            "South Indian": 35, "North Indian": 25,
-            "Chinese": 15, "Dessert": 10, "Beverages": 15
-        }
+        self.monthly_revenue = {}
+        self.last_year_revenue = 0
+        self.daily_revenue = {}
+        self.category_sales = {}
+        self.period_daily_average = 0
         
         # Page layout
         self.create_header()
+        self.load_revenue_data()
         self.create_summary_cards()
         self.create_charts()
     
@@ -80,6 +69,76 @@ class RevenuePage(tk.Frame):
         # Add event binding
         self.period_combobox.bind("<<ComboboxSelected>>", self.update_data)
     
+    def _fetch(self, path, params):
+        """GET an aggregate from the backend, returning [] when it is unavailable"""
+        try:
+            resp = requests.get(f"http://127.0.0.1:5000{path}", params=params, timeout=5)
+            if resp.status_code == 200:
+                data = resp.json()
+                return data.get("revenue", data.get("categories", []))
+            print(f"Failed to fetch {path}: {resp.status_code}")
+        except Exception as e:
+            print(f"Failed to fetch {path}: {e}")
+        return []
+    
+    def _period_range(self, period):
+        """Return (start, end) dates for a period name, end exclusive"""
+        today = datetime.date.today()
+        tomorrow = today + datetime.timedelta(days=1)
+        month_start = today.replace(day=1)
+        if period == "Last 7 Days":
+            return today - datetime.timedelta(days=6), tomorrow
+        if period == "Last 30 Days":
+            return today - datetime.timedelta(days=29), tomorrow
+        if period == "Last Month":
+            last_month_start = (month_start - datetime.timedelta(days=1)).replace(day=1)
+            return last_month_start, month_start
+        if period == "This Year":
+            return today.replace(month=1, day=1), tomorrow
+        return month_start, tomorrow  # This Month
+    
+    def load_revenue_data(self):
+        """Load aggregates from the backend's revenue rollups"""
+        today = datetime.date.today()
+        year_start = today.replace(month=1, day=1)
+        last_year_start = year_start.replace(year=today.year - 1)
+        
+        # Monthly revenue for this year and last year's total, in one request
+        self.monthly_revenue = {calendar.month_abbr[m]: 0 for m in range(1, 13)}
+        self.last_year_revenue = 0
+        rows = self._fetch("/revenue", {
+            "period": "monthly",
+            "from": last_year_start.isoformat(),
+            "to": year_start.replace(year=today.year + 1).isoformat()
+        })
+        for row in rows:
+            year, month = (int(part) for part in row["period"].split("-"))
+            if year == today.year:
+                self.monthly_revenue[calendar.month_abbr[month]] = row["revenue"]
+            else:
+                self.last_year_revenue += row["revenue"]
+        
+        # Daily revenue for the current week
+        week_start = today - datetime.timedelta(days=today.weekday())
+        self.daily_revenue = {calendar.day_abbr[d]: 0 for d in range(7)}
+        rows = self._fetch("/revenue", {
+            "period": "daily",
+            "from": week_start.isoformat(),
+            "to": (week_start + datetime.timedelta(days=7)).isoformat()
+        })
+        for row in rows:
+            day = datetime.date.fromisoformat(row["period"])
+            self.daily_revenue[calendar.day_abbr[day.weekday()]] = row["revenue"]
+        
+        # Daily average and category split for the selected period
+        start, end = self._period_range(self.period_combobox.get())
+        period_params = {"from": start.isoformat(), "to": end.isoformat()}
+        rows = self._fetch("/revenue", dict(period_params, period="daily"))
+        days = max((min(end, today + datetime.timedelta(days=1)) - start).days, 1)
+        self.period_daily_average = sum(row["revenue"] for row in rows) / days
+        rows = self._fetch("/revenue/categories", period_params)
+        self.category_sales = {row["category"]: row["revenue"] for row in rows}
+    
     def create_summary_cards(self):
         # Summary statistics cards
         self.summary_frame = tk.Frame(self, bg=COLORS["bg_main"])
@@ -110,12 +169,19 @@ class RevenuePage(tk.Frame):
         self.total_revenue_value.pack(anchor="w", pady=5)
         
         # Percentage increase from previous year
+        if self.last_year_revenue:
+            year_change = ((total_revenue - self.last_year_revenue) / self.last_year_revenue) * 100
+            year_change_text = f"↑ {year_change:.1f}% from last year" if year_change >= 0 else f"↓ {-year_change:.1f}% from last year"
+            year_change_color = COLORS["secondary"] if year_change >= 0 else COLORS["danger"]
+        else:
+            year_change_text = "No data for last year"
+            year_change_color = COLORS["text_secondary"]
         self.total_revenue_change = tk.Label(
             self.total_revenue_card,
-            text="↑ 12.5% from last year",
+            text=year_change_text,
             font=("Segoe UI", 10),
             bg=COLORS["bg_card"],
-            fg=COLORS["secondary"]
+            fg=year_change_color
         )
         self.total_revenue_change.pack(anchor="w")
         
@@ -123,7 +189,9 @@ class RevenuePage(tk.Frame):
         self.monthly_avg_card = Card(self.summary_frame, width=250, height=120)
         self.monthly_avg_card.pack(side=tk.LEFT, padx=(0, 10))
         
-        monthly_avg = sum(self.monthly_revenue.values()) / len(self.monthly_revenue)
+        # Average over the months elapsed so far this year
+        months_so_far = list(self.monthly_revenue.keys())[:datetime.date.today().month]
+        monthly_avg = sum(self.monthly_revenue[m] for m in months_so_far) / len(months_so_far)
         
         self.monthly_avg_title = tk.Label(
             self.monthly_avg_card,
@@ -144,10 +212,11 @@ class RevenuePage(tk.Frame):
         self.monthly_avg_value.pack(anchor="w", pady=5)
         
         # Best vs worst month
-        current_month = datetime.datetime.now().strftime("%b")
+        best_month = max(months_so_far, key=self.monthly_revenue.get)
+        worst_month = min(months_so_far, key=self.monthly_revenue.get)
         self.monthly_avg_info = tk.Label(
             self.monthly_avg_card,
-            text=f"Best: Dec | Worst: Jan",
+            text=f"Best: {best_month} | Worst: {worst_month}",
             font=("Segoe UI", 10),
             bg=COLORS["bg_card"],
             fg=COLORS["text_secondary"]
@@ -155,7 +224,7 @@ class RevenuePage(tk.Frame):
         self.monthly_avg_info.pack(anchor="w")
         
         # This Month Card
-        this_month = datetime.datetime.now().strftime("%b")
+        this_month = calendar.month_abbr[datetime.date.today().month]
         this_month_revenue = self.monthly_revenue.get(this_month, 0)
         
         self.this_month_card = Card(self.summary_frame, width=250, height=120)
@@ -181,9 +250,9 @@ class RevenuePage(tk.Frame):
         
         # Compare with previous month
         prev_month_idx = list(self.monthly_revenue.keys()).index(this_month) - 1
-        if prev_month_idx >= 0:
-            prev_month = list(self.monthly_revenue.keys())[prev_month_idx]
-            prev_month_revenue = self.monthly_revenue[prev_month]
+        prev_month = list(self.monthly_revenue.keys())[prev_month_idx] if prev_month_idx >= 0 else None
+        prev_month_revenue = self.monthly_revenue[prev_month] if prev_month else 0
+        if prev_month_revenue:
             change = ((this_month_revenue - prev_month_revenue) / prev_month_revenue) * 100
             change_text = f"↑ {change:.1f}% from {prev_month}" if change >= 0 else f"↓ {-change:.1f}% from {prev_month}"
             change_color = COLORS["secondary"] if change >= 0 else COLORS["danger"]
@@ -204,11 +273,11 @@ class RevenuePage(tk.Frame):
         self.daily_avg_card = Card(self.summary_frame, width=250, height=120)
         self.daily_avg_card.pack(side=tk.LEFT)
         
-        daily_avg = sum(self.daily_revenue.values()) / len(self.daily_revenue)
+        daily_avg = self.period_daily_average
         
         self.daily_avg_title = tk.Label(
             self.daily_avg_card,
-            text="DAILY AVERAGE",
+            text=f"DAILY AVERAGE ({self.period_combobox.get().upper()})",
             font=("Segoe UI", 10),
             bg=COLORS["bg_card"],
             fg=COLORS["text_secondary"]
@@ -237,6 +306,10 @@ class RevenuePage(tk.Frame):
         self.daily_avg_info.pack(anchor="w")
     
     def create_charts(self):
+        # matplotlib is slow to import, so load it when the charts are first drawn
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
         # Charts container
         self.charts_frame = tk.Frame(self, bg=COLORS["bg_main"])
         self.charts_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
@@ -246,7 +319,7 @@ class RevenuePage(tk.Frame):
         self.monthly_chart_card.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 10))
         
         # Create matplotlib figure for monthly chart
-        self.monthly_fig = plt.Figure(figsize=(6, 4), dpi=100)
+        self.monthly_fig = Figure(figsize=(6, 4), dpi=100)
         self.monthly_ax = self.monthly_fig.add_subplot(111)
         
         months = list(self.monthly_revenue.keys())
@@ -255,7 +328,7 @@ class RevenuePage(tk.Frame):
         bars = self.monthly_ax.bar(months, values, color=COLORS["primary"])
         
         # Highlight current month
-        current_month = datetime.datetime.now().strftime("%b")
+        current_month = calendar.month_abbr[datetime.date.today().month]
         if current_month in months:
             idx = months.index(current_month)
             bars[idx].set_color(COLORS["secondary"])
@@ -285,7 +358,7 @@ class RevenuePage(tk.Frame):
         self.daily_chart_card.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
         
         # Create matplotlib figure for daily chart
-        self.daily_fig = plt.Figure(figsize=(6, 2), dpi=100)
+        self.daily_fig = Figure(figsize=(6, 2), dpi=100)
         self.daily_ax = self.daily_fig.add_subplot(111)
         
         days = list(self.daily_revenue.keys())
@@ -294,7 +367,7 @@ class RevenuePage(tk.Frame):
         daily_bars = self.daily_ax.bar(days, daily_values, color=COLORS["primary"])
         
         # Highlight current day
-        current_day = datetime.datetime.now().strftime("%a")
+        current_day = calendar.day_abbr[datetime.date.today().weekday()]
         if current_day in days:
                 idx = days.index(current_day)
                 daily_bars[idx].set_color(COLORS["secondary"])
@@ -317,7 +390,7 @@ class RevenuePage(tk.Frame):
         self.category_chart_card = Card(self.right_charts_frame, title="Sales by Category")
         self.category_chart_card.pack(fill=tk.BOTH, expand=True)
         
-        self.category_fig = plt.Figure(figsize=(6, 2), dpi=100)
+        self.category_fig = Figure(figsize=(6, 2), dpi=100)
         self.category_ax = self.category_fig.add_subplot(111)
         
         categories = list(self.category_sales.keys())
@@ -333,7 +406,11 @@ class RevenuePage(tk.Frame):
             COLORS.get("info", "#1abc9c")     # Use get() with fallback
         ]
         
-        self.category_ax.pie(sales_values, labels=categories, autopct='%1.1f%%', colors=chart_colors[:len(categories)])
+        if sum(sales_values) > 0:
+            self.category_ax.pie(sales_values, labels=categories, autopct='%1.1f%%', colors=chart_colors[:len(categories)])
+        else:
+            self.category_ax.text(0.5, 0.5, "No sales in this period", ha='center', va='center')
+            self.category_ax.axis('off')
         self.category_ax.set_title("Sales by Category", fontsize=12)
         
         self.category_canvas = FigureCanvasTkAgg(self.category_fig, master=self.category_chart_card)
@@ -341,6 +418,9 @@ class RevenuePage(tk.Frame):
         self.category_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
     
     def update_data(self, event=None):
-        # Placeholder for updating data based on selected period
-        selected_period = self.period_combobox.get()
-        print(f"Updating data for: {selected_period}")
+        """Reload aggregates for the selected period and rebuild cards and charts"""
+        self.load_revenue_data()
+        self.summary_frame.destroy()
+        self.charts_frame.destroy()
+        self.create_summary_cards()
+        self.create_charts()
@@ -0,0 +1,145 @@
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+    """
+    Bounded pool of long-lived SQLite connections shared by all backend routes.
+
+    Connections are opened lazily up to ``size`` and tuned with the configured
+    pragmas once, when they are created. Each connection is handed to a single
+    thread at a time, and because it stays open between requests sqlite3's
+    per-connection statement cache keeps prepared statements warm.
+    """
+
+    def __init__(self, db_path, size=8, pragmas=None, timeout=10.0, cached_statements=256):
+        self.db_path = db_path
+        self.size = size
+        self.pragmas = dict(pragmas or {})
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue()  # LIFO keeps the most recently used (hottest) connections busy
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._closed = False
+        self._counters = {
+            "acquired": 0,
+            "waited": 0,
+            "wait_time": 0.0,
+            "timeouts": 0,
+            "rollbacks": 0,
+        }
+
+    def _create_connection(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,  # the pool guarantees one thread at a time
+            cached_statements=self.cached_statements
+        )
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._opened < self.size
+            if can_open:
+                self._opened += 1
+        if can_open:
+            try:
+                return self._create_connection()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+
+        # Pool exhausted, wait for another request to hand its connection back
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self._counters["timeouts"] += 1
+            raise sqlite3.OperationalError("Timed out waiting for a pooled database connection")
+        with self._lock:
+            self._counters["waited"] += 1
+            self._counters["wait_time"] += time.perf_counter() - start
+        return conn
+
+    def _release(self, conn):
+        if self._closed:
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Check out a connection for the current thread.
+        Commits when the block succeeds and rolls back if it raises. Nested use
+        from the same thread shares the outer connection and transaction.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn
+            return
+
+        conn = self._acquire()
+        with self._lock:
+            self._counters["acquired"] += 1
+        self._local.conn = conn
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            with self._lock:
+                self._counters["rollbacks"] += 1
+            raise
+        finally:
+            self._local.conn = None
+            self._release(conn)
+
+    def stats(self):
+        """Return a snapshot of pool usage for monitoring"""
+        with self._lock:
+            counters = dict(self._counters)
+            opened = self._opened
+        idle = self._idle.qsize()
+        waited = counters["waited"]
+        return {
+            "size": self.size,
+            "open": opened,
+            "idle": idle,
+            "in_use": opened - idle,
+            "acquired": counters["acquired"],
+            "waited": waited,
+            "avg_wait_ms": round(counters["wait_time"] * 1000 / waited, 3) if waited else 0.0,
+            "timeouts": counters["timeouts"],
+            "rollbacks": counters["rollbacks"],
+            "pragmas": self.pragmas,
+        }
+
+    def close_all(self):
+        """Close every idle connection; connections in use are closed on release"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
@@ -0,0 +1,43 @@
+import threading
+
+
+class OrderEvents:
+    """
+    In-process wake-up channel for long-poll requests waiting on an order.
+    Waiters subscribe to an order id and block on the returned event;
+    publishing the id wakes all of them at once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters = {}  # order_id -> [event, subscriber count]
+
+    def subscribe(self, order_id):
+        """Register interest in an order and return the event to wait on"""
+        with self._lock:
+            entry = self._waiters.get(order_id)
+            if entry is None:
+                entry = self._waiters[order_id] = [threading.Event(), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def unsubscribe(self, order_id):
+        with self._lock:
+            entry = self._waiters.get(order_id)
+            if entry is None:
+                return
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self._waiters[order_id]
+
+    def publish(self, order_id):
+        """Wake every request waiting on this order"""
+        with self._lock:
+            entry = self._waiters.get(order_id)
+        if entry is not None:
+            entry[0].set()
+
+    def waiting(self):
+        """Number of requests currently parked on an order"""
+        with self._lock:
+            return sum(count for _, count in self._waiters.values())
@@ -0,0 +1,76 @@
+# Food-type tags share the category column but aren't sales categories
+FOOD_TYPES = {'Veg', 'Non Veg', 'Jain'}
+
+# Orders are bucketed by their local creation date
+ORDER_DAY = "date(created_at, 'localtime')"
+
+
+def _add_category_revenue(cursor, day, rows):
+    """
+    Add (category string, revenue_paise) rows into category_revenue_daily.
+    An item listed under several categories has its revenue split evenly
+    between them (the odd paise go to the first ones), so the categories still
+    add up to the revenue actually taken.
+    """
+    totals = {}
+    for category, revenue_paise in rows:
+        cats = [cat.strip() for cat in (category or '').split(',') if cat.strip()]
+        cats = [cat for cat in cats if cat not in FOOD_TYPES] or ['Other']
+        share, remainder = divmod(revenue_paise or 0, len(cats))
+        for index, cat in enumerate(cats):
+            totals[cat] = totals.get(cat, 0) + share + (1 if index < remainder else 0)
+    cursor.executemany('''
+        INSERT INTO category_revenue_daily (day, category, revenue_paise) VALUES (?, ?, ?)
+        ON CONFLICT (day, category) DO UPDATE SET revenue_paise = revenue_paise + excluded.revenue_paise
+    ''', [(day, cat, paise) for cat, paise in totals.items()])
+
+
+def record_paid_order(cursor, order_id):
+    """Fold a newly paid order into the revenue rollups (same transaction as the payment update)"""
+    cursor.execute(f'''
+        SELECT {ORDER_DAY}, CAST(ROUND(total * 100) AS INTEGER) FROM orders WHERE id = ?
+    ''', (order_id,))
+    row = cursor.fetchone()
+    if not row:
+        return
+    day, total_paise = row
+    cursor.execute('''
+        INSERT INTO revenue_daily (day, revenue_paise, order_count) VALUES (?, ?, 1)
+        ON CONFLICT (day) DO UPDATE SET
+            revenue_paise = revenue_paise + excluded.revenue_paise,
+            order_count = order_count + 1
+    ''', (day, total_paise))
+    cursor.execute('''
+        SELECT m.category, SUM(oi.qty * oi.unit_price_paise)
+        FROM order_items oi LEFT JOIN menu_items m ON m.id = oi.menu_item_id
+        WHERE oi.order_id = ?
+        GROUP BY m.category
+    ''', (order_id,))
+    _add_category_revenue(cursor, day, cursor.fetchall())
+
+
+def rebuild_rollups(cursor):
+    """Recompute both rollup tables from every paid order"""
+    cursor.execute('DELETE FROM revenue_daily')
+    cursor.execute('DELETE FROM category_revenue_daily')
+    cursor.execute(f'''
+        INSERT INTO revenue_daily (day, revenue_paise, order_count)
+        SELECT {ORDER_DAY}, SUM(CAST(ROUND(total * 100) AS INTEGER)), COUNT(*)
+        FROM orders
+        WHERE payment_status = 'paid'
+        GROUP BY 1
+    ''')
+    cursor.execute('''
+        SELECT date(o.created_at, 'localtime'), m.category, SUM(oi.qty * oi.unit_price_paise)
+        FROM orders o
+        JOIN order_items oi ON oi.order_id = o.id
+        LEFT JOIN menu_items m ON m.id = oi.menu_item_id
+        WHERE o.payment_status = 'paid'
+        GROUP BY 1, 2
+        ORDER BY 1
+    ''')
+    by_day = {}
+    for day, category, revenue_paise in cursor.fetchall():
+        by_day.setdefault(day, []).append((category, revenue_paise))
+    for day, rows in by_day.items():
+        _add_category_revenue(cursor, day, rows)
@@ -0,0 +1,132 @@
+import json
+import os
+import sys
+
+from revenue import rebuild_rollups
+
+# The menu price parser and price column migration are shared with the kiosk,
+# which writes menu_items too; they live in the top-level database package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database.menu_prices import migrate_menu_price_paise, parse_price_paise
+
+
+def insert_order_items(cursor, order_id, items):
+    """Write an order's line items into order_items using the caller's transaction"""
+    insert_many_order_items(cursor, [(order_id, items)])
+
+
+def insert_many_order_items(cursor, orders):
+    """Write the line items of several (order_id, items) pairs with a single executemany"""
+    rows = []
+    for order_id, items in orders:
+        for item in items:
+            rows.append((
+                order_id,
+                item.get('id'),
+                item.get('name'),
+                item.get('name'),
+                int(item.get('qty', 1)),
+                int(item['price_paise']) if item.get('price_paise') is not None else parse_price_paise(item.get('price', 0))
+            ))
+    # Resolve the menu item by name when the client didn't send its id
+    cursor.executemany('''
+        INSERT INTO order_items (order_id, menu_item_id, name, qty, unit_price_paise)
+        VALUES (?, COALESCE(?, (SELECT id FROM menu_items WHERE name = ?)), ?, ?, ?)
+    ''', rows)
+
+
+def _migrate_order_items(c):
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS order_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL REFERENCES orders (id),
+            menu_item_id INTEGER REFERENCES menu_items (id),
+            name TEXT NOT NULL, -- kept so history survives menu renames/removals
+            qty INTEGER NOT NULL,
+            unit_price_paise INTEGER NOT NULL
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items (order_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_order_items_menu_item_id ON order_items (menu_item_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_menu_items_name ON menu_items (name)')
+    # Backfill from the JSON items column of existing orders
+    c.execute('SELECT id, items FROM orders WHERE id NOT IN (SELECT order_id FROM order_items)')
+    for order_id, items in c.fetchall():
+        try:
+            insert_order_items(c, order_id, json.loads(items or '[]'))
+        except (ValueError, TypeError, ArithmeticError) as e:
+            print(f'Skipping order {order_id} during order_items backfill: {e}')
+
+
+def _migrate_revenue_rollups(c):
+    # One row per day, maintained incrementally as orders are paid
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS revenue_daily (
+            day TEXT PRIMARY KEY, -- YYYY-MM-DD, local time
+            revenue_paise INTEGER NOT NULL DEFAULT 0, -- order totals including tax
+            order_count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS category_revenue_daily (
+            day TEXT NOT NULL,
+            category TEXT NOT NULL,
+            revenue_paise INTEGER NOT NULL DEFAULT 0, -- line item revenue before tax
+            PRIMARY KEY (day, category)
+        )
+    ''')
+    rebuild_rollups(c)
+
+
+def _migrate_order_idempotency_keys(c):
+    # Client-generated key per order, so resent and replayed orders are stored once
+    columns = [row[1] for row in c.execute('PRAGMA table_info(orders)')]
+    if 'idempotency_key' not in columns:
+        c.execute('ALTER TABLE orders ADD COLUMN idempotency_key TEXT')
+    c.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_orders_idempotency_key ON orders (idempotency_key)')
+
+
+# Applied in order; PRAGMA user_version records how many have run
+MIGRATIONS = [
+    _migrate_order_items,
+    _migrate_revenue_rollups,
+    migrate_menu_price_paise,
+    _migrate_order_idempotency_keys,
+]
+
+
+def init_db(conn):
+    """Create the backend tables and indexes if needed and run pending migrations"""
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS menu_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            price TEXT NOT NULL,
+            description TEXT,
+            image_url TEXT,
+            category TEXT,
+            price_paise INTEGER
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            items TEXT NOT NULL, -- JSON string of items
+            special_instructions TEXT,
+            total REAL NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            payment_status TEXT DEFAULT 'unpaid',
+            idempotency_key TEXT
+        )
+    ''')
+    # Keyset pagination on GET /orders filters by status and walks ids in order
+    c.execute('CREATE INDEX IF NOT EXISTS idx_orders_payment_status_id ON orders (payment_status, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders (created_at)')
+
+    version = c.execute('PRAGMA user_version').fetchone()[0]
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        print(f'Applying database migration {number}: {migration.__name__}')
+        migration(c)
+        c.execute(f'PRAGMA user_version = {number}')
+        conn.commit()
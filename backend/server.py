@@ -1,45 +1,229 @@
 from flask import Flask, request, jsonify
-import sqlite3
+import atexit
 import json
 import os
+from datetime import datetime
+
+from db import ConnectionPool
+from events import OrderEvents
+from revenue import record_paid_order
+from schema import init_db, insert_order_items, insert_many_order_items, parse_price_paise
 
 app = Flask(__name__)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, '../database/canteen.db')
 
+# Connection pool settings, overridable from the environment for tuning at rush hour
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 8))
+DB_PRAGMAS = {
+    'journal_mode': 'WAL',  # readers no longer block on order inserts
+    'synchronous': os.environ.get('DB_SYNCHRONOUS', 'NORMAL'),
+    'cache_size': int(os.environ.get('DB_CACHE_SIZE', -16000)),  # negative value means KiB
+    'mmap_size': int(os.environ.get('DB_MMAP_SIZE', 64 * 1024 * 1024)),
+    'temp_store': 'MEMORY',
+    'busy_timeout': int(os.environ.get('DB_BUSY_TIMEOUT_MS', 5000)),
+}
+
+pool = ConnectionPool(DB_PATH, size=DB_POOL_SIZE, pragmas=DB_PRAGMAS)
+atexit.register(pool.close_all)
+
+with pool.connection() as conn:
+    init_db(conn)
+
+ORDERS_PAGE_DEFAULT = 50
+ORDERS_PAGE_MAX = 200
+ORDERS_BATCH_MAX = 500  # orders accepted by one POST /orders/batch
+
+# How GET /revenue buckets the revenue_daily rollup
+REVENUE_PERIODS = {
+    'daily': 'day',
+    'weekly': "strftime('%Y-W%W', day)",
+    'monthly': "strftime('%Y-%m', day)",
+}
+
+# Long-poll requests on an order's payment status are woken by mark_order_paid
+order_events = OrderEvents()
+PAYMENT_WAIT_MAX = 30
+
+# UTC, as SQLite's CURRENT_TIMESTAMP writes it
+ORDER_CREATED_AT_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def _order_error(order):
+    """Return why an order payload can't be stored, or None if it is valid"""
+    if not isinstance(order, dict):
+        return 'Order must be an object'
+    total = order.get('total', 0.0)
+    if isinstance(total, bool) or not isinstance(total, (int, float)) or total < 0:
+        return 'total must be a non-negative number'
+    items = order.get('items', [])
+    if not isinstance(items, list):
+        return 'items must be a list'
+    for item in items:
+        if not isinstance(item, dict) or not item.get('name'):
+            return 'Every item needs a name'
+        try:
+            int(item.get('qty', 1))
+            if item.get('price_paise') is not None:
+                int(item['price_paise'])
+            else:
+                parse_price_paise(item.get('price', 0))
+        except (ValueError, TypeError, ArithmeticError):
+            return f"Invalid qty or price for {item['name']}"
+    # A replayed order's created_at is stored as is, so it must be in CURRENT_TIMESTAMP's format
+    created_at = order.get('created_at')
+    if created_at is not None:
+        try:
+            datetime.strptime(created_at, ORDER_CREATED_AT_FORMAT)
+        except (ValueError, TypeError):
+            return 'created_at must be YYYY-MM-DD HH:MM:SS'
+    return None
+
 @app.route('/orders', methods=['POST'])
 def create_order():
-    order_data = request.get_json()
+    """
+    Store one order. A client that may resend it (e.g. after a timeout) passes
+    an Idempotency-Key header or idempotency_key field; resending with the same
+    key returns the order stored the first time with status 200.
+    """
+    order_data = request.get_json(silent=True)
     print('Received order:', order_data)
+    error = _order_error(order_data)
+    if error:
+        return jsonify({'status': 'error', 'message': error}), 400
     # Extract order fields
-    items = json.dumps(order_data.get('items', []))
+    order_items = order_data.get('items', [])
+    items = json.dumps(order_items)
     special_instructions = order_data.get('special_instructions', '')
     total = order_data.get('total', 0.0)
-    # Insert into database
+    key = request.headers.get('Idempotency-Key') or order_data.get('idempotency_key')
+    # Insert the order and its line items in one transaction
     try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute('''
-            INSERT INTO orders (items, special_instructions, total)
-            VALUES (?, ?, ?)
-        ''', (items, special_instructions, total))
-        order_id = c.lastrowid  # Get the last inserted order ID
-        conn.commit()
-        conn.close()
+        with pool.connection() as conn:
+            c = conn.cursor()
+            # Skips a key that is already stored, even one committed by a concurrent request;
+            # other constraint failures still raise
+            c.execute('''
+                INSERT INTO orders (items, special_instructions, total, idempotency_key)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (idempotency_key) DO NOTHING
+            ''', (items, special_instructions, total, str(key) if key else None))
+            duplicate = not c.rowcount
+            if duplicate:
+                c.execute('SELECT id FROM orders WHERE idempotency_key = ?', (str(key),))
+                order_id = c.fetchone()[0]
+            else:
+                order_id = c.lastrowid  # Get the last inserted order ID
+                insert_order_items(c, order_id, order_items)
+        if duplicate:
+            return jsonify({'status': 'success', 'message': 'Order already received', 'order_id': order_id,
+                            'duplicate': True}), 200
         return jsonify({'status': 'success', 'message': 'Order received', 'order_id': order_id}), 201
     except Exception as e:
         print('DB Error:', e)
         return jsonify({'status': 'error', 'message': 'Failed to save order'}), 500
 
+def _order_ids_by_key(c, keys):
+    """Map idempotency keys to stored order ids (keys beyond the batch limit aren't expected)"""
+    placeholders = ', '.join('?' * len(keys))
+    c.execute(f'SELECT idempotency_key, id FROM orders WHERE idempotency_key IN ({placeholders})', list(keys))
+    return dict(c.fetchall())
+
+@app.route('/orders/batch', methods=['POST'])
+def create_orders_batch():
+    """
+    Store many orders in one transaction, e.g. orders a kiosk queued while the
+    backend was unreachable. Every order needs an idempotency_key and may carry
+    its original created_at. An order whose key is already stored is not
+    inserted again, so a batch can safely be resent; each result maps the key
+    to its order id.
+    """
+    data = request.get_json(silent=True) or {}
+    orders = data.get('orders')
+    if not isinstance(orders, list) or not orders:
+        return jsonify({'status': 'error', 'message': 'orders must be a non-empty list'}), 400
+    if len(orders) > ORDERS_BATCH_MAX:
+        return jsonify({'status': 'error', 'message': f'At most {ORDERS_BATCH_MAX} orders per batch'}), 400
+    if not all(isinstance(order, dict) and order.get('idempotency_key') for order in orders):
+        return jsonify({'status': 'error', 'message': 'Every order needs an idempotency_key'}), 400
+    # Reject the batch but name the bad orders, so a sync client can set just those aside
+    errors = {index: _order_error(order) for index, order in enumerate(orders)}
+    invalid = [index for index, error in errors.items() if error]
+    if invalid:
+        return jsonify({'status': 'error', 'message': f'Order {invalid[0]}: {errors[invalid[0]]}',
+                        'invalid': invalid}), 400
+
+    # The first order with a key wins, also within the batch
+    unique = {}
+    for order in orders:
+        unique.setdefault(str(order['idempotency_key']), order)
+    try:
+        with pool.connection() as conn:
+            c = conn.cursor()
+            # Take the write lock before looking up keys so a concurrent batch can't slip in between
+            c.execute('BEGIN IMMEDIATE')
+            existing = _order_ids_by_key(c, unique)
+            new_orders = {key: order for key, order in unique.items() if key not in existing}
+            c.executemany('''
+                INSERT INTO orders (items, special_instructions, total, idempotency_key, created_at)
+                VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+                ON CONFLICT (idempotency_key) DO NOTHING
+            ''', [(json.dumps(order.get('items', [])), order.get('special_instructions', ''), order.get('total', 0.0),
+                   key, order.get('created_at')) for key, order in new_orders.items()])
+            ids = _order_ids_by_key(c, unique)
+            insert_many_order_items(c, [(ids[key], order.get('items', [])) for key, order in new_orders.items()])
+        results = []
+        for order in orders:
+            key = str(order['idempotency_key'])
+            results.append({'idempotency_key': key, 'order_id': ids[key],
+                            'duplicate': key in existing or unique[key] is not order})
+        return jsonify({'status': 'success', 'orders': results}), 201
+    except Exception as e:
+        print('DB Error:', e)
+        return jsonify({'status': 'error', 'message': 'Failed to save orders'}), 500
+
 @app.route('/orders', methods=['GET'])
 def get_orders():
+    """
+    List orders one page at a time using keyset pagination.
+    Query params: after_id (the previous page's next_after_id), limit,
+    payment_status, created_from (inclusive) and created_to (exclusive).
+    payment_status=unpaid matches every order that isn't paid, including ones
+    with another or no status, as the admin Unpaid view always has.
+    """
+    after_id = request.args.get('after_id', 0, type=int)
+    limit = request.args.get('limit', ORDERS_PAGE_DEFAULT, type=int)
+    limit = max(1, min(limit, ORDERS_PAGE_MAX))
+    payment_status = request.args.get('payment_status')
+    created_from = request.args.get('created_from')
+    created_to = request.args.get('created_to')
+
+    conditions = ['id > ?']
+    params = [after_id]
+    if payment_status == 'unpaid':
+        conditions.append("payment_status IS NOT 'paid'")
+    elif payment_status:
+        conditions.append('payment_status = ?')
+        params.append(payment_status)
+    if created_from:
+        conditions.append('created_at >= ?')
+        params.append(created_from)
+    if created_to:
+        conditions.append('created_at < ?')
+        params.append(created_to)
+    # Fetch one extra row to know whether there is another page
+    params.append(limit + 1)
+    query = (
+        'SELECT id, items, special_instructions, total, payment_status, created_at FROM orders '
+        f'WHERE {" AND ".join(conditions)} ORDER BY id LIMIT ?'
+    )
     try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute('SELECT id, items, special_instructions, total, payment_status FROM orders')
-        rows = c.fetchall()
-        conn.close()
+        with pool.connection() as conn:
+            c = conn.cursor()
+            c.execute(query, params)
+            rows = c.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
         orders = []
         for row in rows:
             orders.append({
@@ -47,9 +231,11 @@ def get_orders():
                 'items': json.loads(row[1]),
                 'special_instructions': row[2],
                 'total': row[3],
-                'payment_status': row[4]
+                'payment_status': row[4],
+                'created_at': row[5]
             })
-        return jsonify({'status': 'success', 'orders': orders}), 200
+        next_after_id = rows[-1][0] if has_more else None
+        return jsonify({'status': 'success', 'orders': orders, 'next_after_id': next_after_id}), 200
     except Exception as e:
         print('DB Error:', e)
         return jsonify({'status': 'error', 'message': 'Failed to fetch orders'}), 500
@@ -57,13 +243,19 @@ def get_orders():
 @app.route('/orders/<int:order_id>/pay', methods=['POST'])
 def mark_order_paid(order_id):
     try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute('UPDATE orders SET payment_status = ? WHERE id = ?', ('paid', order_id))
-        conn.commit()
-        updated = c.rowcount
-        conn.close()
+        with pool.connection() as conn:
+            c = conn.cursor()
+            # Only a transition to paid counts toward the revenue rollups
+            c.execute('UPDATE orders SET payment_status = ? WHERE id = ? AND payment_status IS NOT ?',
+                      ('paid', order_id, 'paid'))
+            if c.rowcount:
+                record_paid_order(c, order_id)
+                updated = True
+            else:
+                c.execute('SELECT 1 FROM orders WHERE id = ?', (order_id,))
+                updated = c.fetchone() is not None
         if updated:
+            order_events.publish(order_id)
             return jsonify({'status': 'success', 'message': f'Order {order_id} marked as paid'}), 200
         else:
             return jsonify({'status': 'error', 'message': 'Order not found'}), 404
@@ -71,14 +263,27 @@ def mark_order_paid(order_id):
         print('DB Error:', e)
         return jsonify({'status': 'error', 'message': 'Failed to update payment status'}), 500
 
+def _fetch_payment_status(order_id):
+    with pool.connection() as conn:
+        c = conn.cursor()
+        c.execute('SELECT payment_status FROM orders WHERE id = ?', (order_id,))
+        return c.fetchone()
+
 @app.route('/orders/<int:order_id>/status', methods=['GET'])
 def get_payment_status(order_id):
+    """
+    Return an order's payment status. With ?wait=<seconds> the request is held
+    open until the order is paid or the wait runs out (long-poll), so kiosks
+    waiting on a payment don't have to poll.
+    """
+    wait = max(0.0, min(request.args.get('wait', 0, type=float), PAYMENT_WAIT_MAX))
+    # Subscribe before reading so a payment landing in between still wakes us
+    if wait:
+        event = order_events.subscribe(order_id)
     try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute('SELECT payment_status FROM orders WHERE id = ?', (order_id,))
-        row = c.fetchone()
-        conn.close()
+        row = _fetch_payment_status(order_id)
+        if wait and row and row[0] != 'paid' and event.wait(wait):
+            row = _fetch_payment_status(order_id)
         if row:
             return jsonify({'status': 'success', 'payment_status': row[0]}), 200
         else:
@@ -86,6 +291,9 @@ def get_payment_status(order_id):
     except Exception as e:
         print('DB Error:', e)
         return jsonify({'status': 'error', 'message': 'Failed to fetch payment status'}), 500
+    finally:
+        if wait:
+            order_events.unsubscribe(order_id)
 
 @app.route('/menu-items', methods=['POST'])
 def add_menu_item():
@@ -98,14 +306,16 @@ def add_menu_item():
     if not name or not price or not category:
         return jsonify({'status': 'error', 'message': 'Missing required fields'}), 400
     try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute('''
-            INSERT INTO menu_items (name, price, description, image_url, category)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (name, price, description, image_url, category))
-        conn.commit()
-        conn.close()
+        price_paise = parse_price_paise(price)
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Invalid price'}), 400
+    try:
+        with pool.connection() as conn:
+            c = conn.cursor()
+            c.execute('''
+                INSERT INTO menu_items (name, price, description, image_url, category, price_paise)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (name, price, description, image_url, category, price_paise))
         return jsonify({'status': 'success', 'message': 'Menu item added'}), 201
     except Exception as e:
         print('DB Error:', e)
@@ -114,11 +324,10 @@ def add_menu_item():
 @app.route('/menu-items', methods=['GET'])
 def get_menu_items():
     try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute('SELECT id, name, price, description, image_url, category FROM menu_items')
-        rows = c.fetchall()
-        conn.close()
+        with pool.connection() as conn:
+            c = conn.cursor()
+            c.execute('SELECT id, name, price, description, image_url, category, price_paise FROM menu_items')
+            rows = c.fetchall()
         items = []
         for row in rows:
             items.append({
@@ -127,12 +336,91 @@ def get_menu_items():
                 'price': row[2],
                 'description': row[3],
                 'image_url': row[4],
-                'category': row[5]
+                'category': row[5],
+                'price_paise': row[6]
             })
         return jsonify({'status': 'success', 'items': items}), 200
     except Exception as e:
         print('DB Error:', e)
         return jsonify({'status': 'error', 'message': 'Failed to fetch menu items'}), 500
 
+def _day_range_filter():
+    """Build a WHERE clause on rollup days from the from/to (YYYY-MM-DD) query params"""
+    conditions = []
+    params = []
+    if request.args.get('from'):
+        conditions.append('day >= ?')
+        params.append(request.args['from'])
+    if request.args.get('to'):
+        conditions.append('day < ?')
+        params.append(request.args['to'])
+    where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+    return where, params
+
+@app.route('/revenue', methods=['GET'])
+def get_revenue():
+    """
+    Revenue of paid orders per day, week or month.
+    Reads the revenue_daily rollup, so the cost depends on the number of days
+    in range rather than the number of orders. Query params: period
+    (daily|weekly|monthly), from (inclusive) and to (exclusive) as YYYY-MM-DD.
+    """
+    period = request.args.get('period', 'daily')
+    if period not in REVENUE_PERIODS:
+        return jsonify({'status': 'error', 'message': f'Unknown period: {period}'}), 400
+    where, params = _day_range_filter()
+    try:
+        with pool.connection() as conn:
+            c = conn.cursor()
+            c.execute(f'''
+                SELECT {REVENUE_PERIODS[period]} AS bucket, SUM(revenue_paise), SUM(order_count)
+                FROM revenue_daily {where}
+                GROUP BY bucket ORDER BY bucket
+            ''', params)
+            rows = c.fetchall()
+        revenue = []
+        for row in rows:
+            revenue.append({
+                'period': row[0],
+                'revenue_paise': row[1],
+                'revenue': row[1] / 100,
+                'orders': row[2]
+            })
+        return jsonify({'status': 'success', 'period': period, 'revenue': revenue}), 200
+    except Exception as e:
+        print('DB Error:', e)
+        return jsonify({'status': 'error', 'message': 'Failed to fetch revenue'}), 500
+
+@app.route('/revenue/categories', methods=['GET'])
+def get_category_revenue():
+    """Revenue share per menu category for paid orders in the from/to day range"""
+    where, params = _day_range_filter()
+    try:
+        with pool.connection() as conn:
+            c = conn.cursor()
+            c.execute(f'''
+                SELECT category, SUM(revenue_paise) FROM category_revenue_daily {where}
+                GROUP BY category ORDER BY 2 DESC
+            ''', params)
+            rows = c.fetchall()
+        total = sum(row[1] for row in rows)
+        categories = []
+        for row in rows:
+            categories.append({
+                'category': row[0],
+                'revenue_paise': row[1],
+                'revenue': row[1] / 100,
+                'share': round(row[1] * 100 / total, 2) if total else 0.0
+            })
+        return jsonify({'status': 'success', 'categories': categories}), 200
+    except Exception as e:
+        print('DB Error:', e)
+        return jsonify({'status': 'error', 'message': 'Failed to fetch category revenue'}), 500
+
+@app.route('/db/stats', methods=['GET'])
+def get_db_stats():
+    return jsonify({'status': 'success', 'pool': pool.stats(), 'payment_waiters': order_events.waiting()}), 200
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+    # Threaded so parked long-poll requests don't hold up other routes
+    app.run(debug=True, port=5000, threaded=True)
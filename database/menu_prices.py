@@ -0,0 +1,109 @@
+import re
+
+# menu_items keeps the display text ("₹50") in price and integer paise in
+# price_paise. The kiosk and the backend both write the table, so the parser
+# and the triggers keeping the two columns in step live here, shared by both.
+
+# Rupees with at most one decimal point, e.g. "50", "49.5" or ".75"; the same
+# format the triggers below accept
+_PRICE_RE = re.compile(r"(\d+\.?\d*|\.\d+)?")
+_PRICE_WHITESPACE = " \t\r\n"
+
+
+def parse_price_paise(price):
+    """
+    Convert a price such as "₹50", "49.50" or 50 into integer paise, rounding
+    half up. Raises ValueError for anything else (including "NaN").
+    """
+    text = str(price).replace("₹", "").strip(_PRICE_WHITESPACE)
+    if not _PRICE_RE.fullmatch(text):
+        raise ValueError(f"invalid price: {price!r}")
+    rupees, _, fraction = text.partition(".")
+    fraction = fraction.ljust(3, "0")
+    return int(rupees or 0) * 100 + int(fraction[:2]) + (fraction[2] >= "5")
+
+
+def _price_text_sql(price):
+    return f"TRIM(REPLACE({price}, '₹', ''), ' ' || char(9) || char(13) || char(10))"
+
+
+def _price_valid_sql(price):
+    """SQL that is true when parse_price_paise accepts the text"""
+    text = _price_text_sql(price)
+    return (f"({text} = '' OR ({text} GLOB '*[0-9]*' AND {text} NOT GLOB '*[^0-9.]*' "
+            f"AND {text} NOT GLOB '*.*.*'))")
+
+
+def _price_paise_sql(price):
+    """
+    SQL version of parse_price_paise for text _price_valid_sql accepts. It works
+    on the digits rather than a REAL, so both round the same way.
+    """
+    text = _price_text_sql(price)
+    rupees = f"CASE WHEN instr({text}, '.') THEN substr({text}, 1, instr({text}, '.') - 1) ELSE {text} END"
+    fraction = f"CASE WHEN instr({text}, '.') THEN substr({text}, instr({text}, '.') + 1) ELSE '' END"
+    return (f"(CAST({rupees} AS INTEGER) * 100 + CAST(substr({fraction} || '00', 1, 2) AS INTEGER) "
+            f"+ (substr({fraction}, 3, 1) >= '5'))")
+
+
+# The "₹50" / "₹49.50" display text for NEW.price_paise
+_PAISE_TO_PRICE = ("'₹' || (NEW.price_paise / 100) || "
+                   "CASE WHEN NEW.price_paise % 100 THEN printf('.%02d', NEW.price_paise % 100) ELSE '' END")
+
+_SET_PAISE_FROM_PRICE = f'''
+    SELECT RAISE(ABORT, 'unreadable menu price') WHERE NOT {_price_valid_sql('NEW.price')};
+    UPDATE menu_items SET price_paise = {_price_paise_sql('NEW.price')} WHERE id = NEW.id;
+'''
+
+# A write that changes only one of the columns updates the other. Triggers do
+# fire each other: setting price_paise from the text fires the paise trigger,
+# which therefore only rewrites the text when it disagrees with the new paise.
+# Text the SQL parser can't read aborts the write rather than storing a price.
+_PRICE_TRIGGERS = [
+    f'''
+    CREATE TRIGGER menu_items_price_paise_after_insert AFTER INSERT ON menu_items
+    WHEN NEW.price_paise IS NULL
+    BEGIN {_SET_PAISE_FROM_PRICE} END
+    ''',
+    f'''
+    CREATE TRIGGER menu_items_price_changed AFTER UPDATE OF price ON menu_items
+    WHEN NEW.price IS NOT OLD.price AND NEW.price_paise IS OLD.price_paise
+    BEGIN {_SET_PAISE_FROM_PRICE} END
+    ''',
+    f'''
+    CREATE TRIGGER menu_items_price_paise_changed AFTER UPDATE OF price_paise ON menu_items
+    WHEN NEW.price_paise IS NOT OLD.price_paise AND NEW.price IS OLD.price AND NEW.price_paise IS NOT NULL
+        AND NOT ({_price_valid_sql('NEW.price')} AND {_price_paise_sql('NEW.price')} = NEW.price_paise)
+    BEGIN UPDATE menu_items SET price = {_PAISE_TO_PRICE} WHERE id = NEW.id; END
+    ''',
+]
+_PRICE_TRIGGER_NAMES = ['menu_items_price_paise_after_insert', 'menu_items_price_changed',
+                        'menu_items_price_paise_changed']
+
+
+def migrate_menu_price_paise(c):
+    """
+    Add price_paise to older menu_items tables, bring every row in line with its
+    price text and install the triggers that keep the two in sync. Safe to run
+    on every start.
+    """
+    columns = [row[1] for row in c.execute('PRAGMA table_info(menu_items)')]
+    if 'price_paise' not in columns:
+        c.execute('ALTER TABLE menu_items ADD COLUMN price_paise INTEGER')
+    # The price text is what customers were shown, so it wins over a stale price_paise
+    c.execute('SELECT id, price, price_paise FROM menu_items')
+    stale = []
+    for item_id, price, price_paise in c.fetchall():
+        try:
+            paise = parse_price_paise(price)
+        except ValueError:
+            print(f'Skipping menu item {item_id} with unreadable price {price!r}')
+            continue
+        if paise != price_paise:
+            stale.append((paise, item_id))
+    c.executemany('UPDATE menu_items SET price_paise = ? WHERE id = ?', stale)
+    # Replaced on every run, so a database keeps no trigger from an older version
+    for name in _PRICE_TRIGGER_NAMES:
+        c.execute(f'DROP TRIGGER IF EXISTS {name}')
+    for trigger in _PRICE_TRIGGERS:
+        c.execute(trigger)
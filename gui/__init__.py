@@ -1,2 +1,17 @@
-from .menu_view import MenuView
-from .cart_view import CartView
+import importlib
+
+# Views are imported on first use, after the login screen is up
+_VIEWS = {
+    "MenuView": ".menu_view",
+    "CartView": ".cart_view",
+}
+
+__all__ = list(_VIEWS)
+
+
+def __getattr__(name):
+    if name not in _VIEWS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_VIEWS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -3,18 +3,23 @@ import customtkinter as ctk
 from datetime import datetime
 import os
 import webbrowser
+import threading
 from PIL import Image, ImageDraw
-from services.invoice_service import InvoiceGenerator
+from services.pricing import format_paise, calculate_tax_paise
 import requests
-import qrcode
+
+# How often the Tk loop checks the checkout worker for progress
+CHECKOUT_POLL_MS = 50
 
 class CartView:
-    def __init__(self, root, cart_service, menu_service, on_back_to_menu=None):
+    def __init__(self, root, cart_service, menu_service, on_back_to_menu=None, order_journal=None):
         self.root = root
         self.cart_service = cart_service
         self.menu_service = menu_service
+        self.order_journal = order_journal  # orders the backend can't take are queued here
         self.on_back_to_menu = on_back_to_menu
         self.is_destroyed = False
+        self.checkout_poll_id = 0  # bumped to stop an earlier _poll_checkout loop
         
         self.colors = {
             "primary": "#4D77FF",
@@ -29,6 +34,15 @@ class CartView:
             "border": ("#E0E0E0", "#3A3A3A") 
         }
         
+        # Fonts shared by every cart row instead of new CTkFont objects per row
+        self.row_font = ctk.CTkFont(size=14)
+        self.row_button_font = ctk.CTkFont(size=14, weight="bold")
+        
+        # Rendered cart rows by item name, see _reconcile_rows
+        self.rows = {}
+        self.row_order = []
+        self._display_scheduled = False
+        
         # Create a main frame for cart
         self.main_frame = ctk.CTkFrame(root, fg_color="transparent")
         self.main_frame.pack(fill="both", expand=True, padx=0, pady=0)
@@ -43,6 +57,16 @@ class CartView:
         # Update cart items display
         self.update_cart_display()
         
+        # A checkout left unfinished on an earlier visit to the cart carries on here
+        job = self.cart_service.checkout_job
+        if job is not None:
+            # Same instructions, so checking out again resumes the job (and its idempotency key)
+            if job.special_instructions:
+                self.instructions_text.delete("1.0", "end")
+                self.instructions_text.insert("1.0", job.special_instructions)
+            if job.running:
+                self._start_checkout(job)
+        
         # Listen for cart updates using a safe mechanism
         self.listener_id = self.cart_service.add_listener(self._on_cart_update)
 
@@ -51,17 +75,23 @@ class CartView:
     
     def _on_cart_update(self, _):
         """Wrapper method to safely update cart display"""
-        # Only update if the view still exists
-        if not self.is_destroyed and hasattr(self, 'cart_frame'):
-            # Use tkinter's after method to safely update from event loop
-            if hasattr(self, 'main_frame') and self.main_frame.winfo_exists():
-                self.main_frame.after(10, self.update_cart_display)
+        self._schedule_display()
     
     def _on_menu_update(self, _):
         """Update cart display if menu changes (e.g., price/item updates)"""
+        self._schedule_display()
+    
+    def _schedule_display(self):
+        # Only update if the view still exists
         if not self.is_destroyed and hasattr(self, 'cart_frame'):
-            if hasattr(self, 'main_frame') and self.main_frame.winfo_exists():
-                self.main_frame.after(10, self.update_cart_display)
+            # Use tkinter's after method to safely update from event loop; one pending update is enough
+            if hasattr(self, 'main_frame') and self.main_frame.winfo_exists() and not self._display_scheduled:
+                self._display_scheduled = True
+                self.main_frame.after(10, self._run_scheduled_display)
+    
+    def _run_scheduled_display(self):
+        self._display_scheduled = False
+        self.update_cart_display()
     
     def _create_header(self):
         """Create the header section with title and back button"""
@@ -329,6 +359,28 @@ class CartView:
             corner_radius=8
         )
         self.checkout_button.pack(side="right", padx=5)
+        
+        # Checkout progress with Cancel/Retry, shown between the buttons while a checkout runs
+        self.checkout_status_frame = ctk.CTkFrame(button_frame, fg_color="transparent")
+        self.checkout_status_label = ctk.CTkLabel(
+            self.checkout_status_frame,
+            text="",
+            font=ctk.CTkFont(size=14),
+            text_color=self.colors["text_secondary"],
+            wraplength=260
+        )
+        self.checkout_status_label.pack(side="left", expand=True, padx=5)
+        self.checkout_action_button = ctk.CTkButton(
+            self.checkout_status_frame,
+            text="Cancel",
+            fg_color=self.colors["primary"],
+            hover_color=self.colors["secondary"],
+            font=ctk.CTkFont(size=14, weight="bold"),
+            width=80,
+            height=32,
+            corner_radius=8
+        )
+        self.checkout_action_button.pack(side="left", padx=5)
     
     def update_cart_display(self):
         """Update the cart items display"""
@@ -343,6 +395,9 @@ class CartView:
                 
             cart_items = self.cart_service.get_all_items()
             
+            # Bring the rows in line with the cart before deciding what to show
+            subtotal = self._reconcile_rows(cart_items)
+            
             # Check if cart is empty
             if not cart_items:
                 self.empty_cart_label.pack(pady=50)
@@ -360,160 +415,193 @@ class CartView:
                 if hasattr(self, 'checkout_button') and self.checkout_button.winfo_exists():
                     self.checkout_button.configure(state="normal")
             
-            # Check if items container exists, recreate if needed
-            if not hasattr(self, 'items_container') or not self.items_container.winfo_exists():
-                self.items_container = ctk.CTkFrame(self.cart_frame, fg_color="transparent")
-                self.items_container.pack(fill="x", expand=True)
-            
-            # Clear all existing items from the container to prevent duplicates
-            for widget in self.items_container.winfo_children():
-                widget.destroy()
-            
-            # Display cart items
-            subtotal = 0
-            current_item_frames = {}
-            
-            for i, (item_name, quantity) in enumerate(cart_items.items()):
-                # Find the menu item details
-                menu_item = next((item for item in self.menu_service.get_all_items() 
-                                if item["name"] == item_name), None)
-                
-                if menu_item:
-                    # Create a frame for this item with alternating background for better readability
-                    item_frame = ctk.CTkFrame(
-                        self.items_container, 
-                        fg_color="transparent" if i % 2 == 0 else self.colors["hover"],
-                    )
-                    item_frame.pack(fill="x", pady=1)
-                    current_item_frames[item_name] = item_frame
-                    
-                    # Configure grid layout with the same column configuration as header - EXACT MATCH
-                    item_frame.grid_columnconfigure(0, weight=6, minsize=150)  # Item name
-                    item_frame.grid_columnconfigure(1, weight=2, minsize=70)   # Price
-                    item_frame.grid_columnconfigure(2, weight=2, minsize=100)  # Quantity
-                    item_frame.grid_columnconfigure(3, weight=2, minsize=70)   # Total
-                    item_frame.grid_columnconfigure(4, weight=0, minsize=40)   # Remove button
-                    
-                    # Item name with ellipsis for long names
-                    name_label = ctk.CTkLabel(
-                        item_frame, 
-                        text=item_name,
-                        font=ctk.CTkFont(size=14),
-                        anchor="w"
-                    )
-                    name_label.grid(row=0, column=0, sticky="w", padx=10, pady=10)
-                    
-                    # Item price - align right
-                    price_text = menu_item["price"]
-                    price_value = float(price_text.replace("₹", ""))
-                    
-                    ctk.CTkLabel(
-                        item_frame, 
-                        text=price_text,
-                        font=ctk.CTkFont(size=14),
-                        anchor="e",
-                    ).grid(row=0, column=1, sticky="ew", padx=80, pady=10)
-                    
-                    # Quantity controls - create centered container
-                    qty_container = ctk.CTkFrame(item_frame, fg_color="transparent")
-                    qty_container.grid(row=0, column=2, sticky="ew", padx=10, pady=10)  # Centered vertically
-                    
-                    # Center the quantity controls within the frame
-                    qty_frame = ctk.CTkFrame(qty_container, fg_color="transparent")
-                    qty_frame.pack(expand=True)
-                    
-                    # Horizontally layout the quantity controls
-                    minus_btn = ctk.CTkButton(
-                        qty_frame, 
-                        text="−", 
-                        width=28, 
-                        height=28,
-                        fg_color=self.colors["primary"],
-                        hover_color=self.colors["secondary"],
-                        corner_radius=5,
-                        font=ctk.CTkFont(size=14, weight="bold"),
-                        command=lambda name=item_name: self._update_quantity(name, -1)
-                    )
-                    minus_btn.pack(side="left", padx=2)
-                    
-                    qty_label = ctk.CTkLabel(
-                        qty_frame, 
-                        text=str(quantity),
-                        width=30,
-                        font=ctk.CTkFont(size=14),
-                        anchor="center"
-                    )
-                    qty_label.pack(side="left", padx=2)
-                    
-                    plus_btn = ctk.CTkButton(
-                        qty_frame, 
-                        text="+", 
-                        width=28, 
-                        height=28,
-                        fg_color=self.colors["primary"],
-                        hover_color=self.colors["secondary"],
-                        corner_radius=5,
-                        font=ctk.CTkFont(size=14, weight="bold"),
-                        command=lambda name=item_name: self._update_quantity(name, 1)
-                    )
-                    plus_btn.pack(side="left", padx=2)
-                    
-                    # Store reference to quantity label for direct updates
-                    if not hasattr(self, 'qty_labels'):
-                        self.qty_labels = {}
-                    self.qty_labels[item_name] = qty_label
-                    
-                    # Item total - align right consistently with header
-                    item_total = price_value * quantity
-                    subtotal += item_total
-                    
-                    ctk.CTkLabel(
-                        item_frame, 
-                        text=f"₹{item_total:.2f}",
-                        font=ctk.CTkFont(size=14),
-                        anchor="e"
-                    ).grid(row=0, column=3, sticky="e", padx=10, pady=10)
-                    
-                    # Add remove button - centered
-                    remove_container = ctk.CTkFrame(item_frame, fg_color="transparent")
-                    remove_container.grid(row=0, column=4, sticky="ns", padx=10, pady=10)  # Centered vertically
-                    
-                    remove_btn = ctk.CTkButton(
-                        remove_container, 
-                        text="×", 
-                        width=28, 
-                        height=28,
-                        fg_color=self.colors["danger"],
-                        hover_color="#C42B36",
-                        corner_radius=5,
-                        font=ctk.CTkFont(size=14, weight="bold"),
-                        command=lambda name=item_name: self._remove_item(name)
-                    )
-                    remove_btn.pack(expand=True)
-            
-            # Store current item frames for reference
-            self.item_frames = current_item_frames
-            
             # Update the summary
             self.update_summary(subtotal)
         except Exception as e:
             print(f"Error in update_cart_display: {e}")
     
+    def _reconcile_rows(self, cart_items):
+        """
+        Update the rendered rows to match the cart: create rows for new items,
+        destroy rows for removed ones and only reconfigure the labels whose
+        values changed. Returns the subtotal in paise.
+        """
+        # Check if items container exists, recreate if needed
+        if not hasattr(self, 'items_container') or not self.items_container.winfo_exists():
+            self.items_container = ctk.CTkFrame(self.cart_frame, fg_color="transparent")
+            self.items_container.pack(fill="x", expand=True)
+            self.rows = {}
+            self.row_order = []
+        
+        wanted = []
+        for item_name, quantity in cart_items.items():
+            menu_item = self.menu_service.get_item(item_name)
+            if menu_item:
+                wanted.append((item_name, quantity, menu_item))
+        wanted_names = [item_name for item_name, _, _ in wanted]
+        
+        for item_name in [name for name in self.rows if name not in cart_items or name not in wanted_names]:
+            self.rows.pop(item_name)["frame"].destroy()
+        
+        # Pack order is display order; only re-pack when the surviving rows are out of order
+        kept_order = [name for name in self.row_order if name in self.rows]
+        reorder = kept_order != [name for name in wanted_names if name in self.rows]
+        
+        subtotal = 0
+        for i, (item_name, quantity, menu_item) in enumerate(wanted):
+            row = self.rows.get(item_name)
+            if row is None:
+                row = self._create_row(item_name)
+                self.rows[item_name] = row
+                if not reorder:
+                    row["frame"].pack(fill="x", pady=1)
+            
+            # Alternating background for better readability
+            stripe = i % 2
+            if row.get("stripe") != stripe:
+                row["frame"].configure(fg_color="transparent" if stripe == 0 else self.colors["hover"])
+                row["stripe"] = stripe
+            
+            item_total = menu_item["price_paise"] * quantity
+            subtotal += item_total
+            self._set_row_text(row, "price", menu_item["price"])
+            self._set_row_text(row, "qty", str(quantity))
+            self._set_row_text(row, "total", format_paise(item_total))
+        
+        if reorder:
+            for item_name in wanted_names:
+                self.rows[item_name]["frame"].pack_forget()
+            for item_name in wanted_names:
+                self.rows[item_name]["frame"].pack(fill="x", pady=1)
+        self.row_order = wanted_names
+        return subtotal
+    
+    def _set_row_text(self, row, field, text):
+        if row["text"].get(field) != text:
+            row[field + "_label"].configure(text=text)
+            row["text"][field] = text
+    
+    def _create_row(self, item_name):
+        """Build the widgets for one cart row; labels are filled in by _reconcile_rows"""
+        item_frame = ctk.CTkFrame(self.items_container, fg_color="transparent")
+        
+        # Configure grid layout with the same column configuration as header - EXACT MATCH
+        item_frame.grid_columnconfigure(0, weight=6, minsize=150)  # Item name
+        item_frame.grid_columnconfigure(1, weight=2, minsize=70)   # Price
+        item_frame.grid_columnconfigure(2, weight=2, minsize=100)  # Quantity
+        item_frame.grid_columnconfigure(3, weight=2, minsize=70)   # Total
+        item_frame.grid_columnconfigure(4, weight=0, minsize=40)   # Remove button
+        
+        # Item name with ellipsis for long names
+        name_label = ctk.CTkLabel(
+            item_frame, 
+            text=item_name,
+            font=self.row_font,
+            anchor="w"
+        )
+        name_label.grid(row=0, column=0, sticky="w", padx=10, pady=10)
+        
+        # Item price - align right
+        price_label = ctk.CTkLabel(
+            item_frame, 
+            text="",
+            font=self.row_font,
+            anchor="e",
+        )
+        price_label.grid(row=0, column=1, sticky="ew", padx=80, pady=10)
+        
+        # Quantity controls - create centered container
+        qty_container = ctk.CTkFrame(item_frame, fg_color="transparent")
+        qty_container.grid(row=0, column=2, sticky="ew", padx=10, pady=10)  # Centered vertically
+        
+        # Center the quantity controls within the frame
+        qty_frame = ctk.CTkFrame(qty_container, fg_color="transparent")
+        qty_frame.pack(expand=True)
+        
+        # Horizontally layout the quantity controls
+        minus_btn = ctk.CTkButton(
+            qty_frame, 
+            text="−", 
+            width=28, 
+            height=28,
+            fg_color=self.colors["primary"],
+            hover_color=self.colors["secondary"],
+            corner_radius=5,
+            font=self.row_button_font,
+            command=lambda name=item_name: self._update_quantity(name, -1)
+        )
+        minus_btn.pack(side="left", padx=2)
+        
+        qty_label = ctk.CTkLabel(
+            qty_frame, 
+            text="",
+            width=30,
+            font=self.row_font,
+            anchor="center"
+        )
+        qty_label.pack(side="left", padx=2)
+        
+        plus_btn = ctk.CTkButton(
+            qty_frame, 
+            text="+", 
+            width=28, 
+            height=28,
+            fg_color=self.colors["primary"],
+            hover_color=self.colors["secondary"],
+            corner_radius=5,
+            font=self.row_button_font,
+            command=lambda name=item_name: self._update_quantity(name, 1)
+        )
+        plus_btn.pack(side="left", padx=2)
+        
+        # Item total - align right consistently with header
+        total_label = ctk.CTkLabel(
+            item_frame, 
+            text="",
+            font=self.row_font,
+            anchor="e"
+        )
+        total_label.grid(row=0, column=3, sticky="e", padx=10, pady=10)
+        
+        # Add remove button - centered
+        remove_container = ctk.CTkFrame(item_frame, fg_color="transparent")
+        remove_container.grid(row=0, column=4, sticky="ns", padx=10, pady=10)  # Centered vertically
+        
+        remove_btn = ctk.CTkButton(
+            remove_container, 
+            text="×", 
+            width=28, 
+            height=28,
+            fg_color=self.colors["danger"],
+            hover_color="#C42B36",
+            corner_radius=5,
+            font=self.row_button_font,
+            command=lambda name=item_name: self._remove_item(name)
+        )
+        remove_btn.pack(expand=True)
+        
+        return {
+            "frame": item_frame,
+            "price_label": price_label,
+            "qty_label": qty_label,
+            "total_label": total_label,
+            "text": {},
+        }
+    
     def update_summary(self, subtotal):
-        """Update the summary section with calculated values"""
-        tax_rate = 0.05
-        tax = subtotal * tax_rate
+        """Update the summary section from a subtotal in paise"""
+        tax = calculate_tax_paise(subtotal)
         total = subtotal + tax
         
         # Safety check before updating
         if hasattr(self, 'subtotal_label') and self.subtotal_label.winfo_exists():
-            self.subtotal_label.configure(text=f"₹{subtotal:.2f}")
+            self.subtotal_label.configure(text=format_paise(subtotal))
         
         if hasattr(self, 'tax_label') and self.tax_label.winfo_exists():
-            self.tax_label.configure(text=f"₹{tax:.2f}")
+            self.tax_label.configure(text=format_paise(tax))
         
         if hasattr(self, 'total_label') and self.total_label.winfo_exists():
-            self.total_label.configure(text=f"₹{total:.2f}")
+            self.total_label.configure(text=format_paise(total))
     
     def _update_quantity(self, item_name, delta):
         """Update the quantity of an item in the cart"""
@@ -525,38 +613,9 @@ class CartView:
                 self._remove_item(item_name)
             else:
                 self.cart_service.update_quantity(item_name, new_qty)
-                
-                # Directly update quantity label for immediate feedback without redrawing
-                if hasattr(self, 'qty_labels') and item_name in self.qty_labels:
-                    qty_label = self.qty_labels[item_name]
-                    if qty_label.winfo_exists():
-                        qty_label.configure(text=str(new_qty))
-                        
-                        # Also update the item total display
-                        if hasattr(self, 'item_frames') and item_name in self.item_frames:
-                            item_frame = self.item_frames[item_name]
-                            if item_frame.winfo_exists():
-                                # Find menu item price
-                                menu_item = next((item for item in self.menu_service.get_all_items() 
-                                            if item["name"] == item_name), None)
-                                if menu_item:
-                                    price_value = float(menu_item["price"].replace("₹", ""))
-                                    item_total = price_value * new_qty
-                                    
-                                    # Find and update total label (column 3)
-                                    children = item_frame.grid_slaves(row=0, column=3)
-                                    if children:
-                                        total_label = children[0]
-                                        total_label.configure(text=f"₹{item_total:.2f}")
-                
-                # Update summary without redrawing everything
-                cart_items = self.cart_service.get_all_items()
-                subtotal = sum(
-                    float(next((item["price"].replace("₹", "") for item in self.menu_service.get_all_items() 
-                           if item["name"] == item_name), 0)) * qty
-                    for item_name, qty in cart_items.items()
-                )
-                self.update_summary(subtotal)
+                # Reconcile right away for immediate feedback; the scheduled
+                # update from the cart listener then finds nothing to change
+                self.update_cart_display()
         except Exception as e:
             print(f"Error updating quantity: {e}")
     
@@ -574,66 +633,70 @@ class CartView:
         self.instructions_text.insert("1.0", default_text)
     
     def _checkout(self):
-        """Process checkout and generate invoice, and send order to backend"""
+        """Send the order, generate the invoice and QR code on a worker and show progress here"""
+        # Only needed at checkout, so kept off the kiosk's startup path
+        from services.checkout_service import CheckoutJob
+
         # Get special instructions
         special_instructions = self.instructions_text.get("1.0", "end-1c").strip()
         default_text = "Add any special requirements or instructions (e.g., allergies, spice level, etc.)"
         if special_instructions == default_text:
             special_instructions = ""
 
-        # Prepare order data for backend
+        # Resume a cancelled, failed or abandoned checkout of the same cart rather than ordering
+        # it twice; the job lives on the cart service so it outlives this view
         cart_items = self.cart_service.get_all_items()
-        order_items = []
-        for item_name, qty in cart_items.items():
-            menu_item = next((item for item in self.menu_service.get_all_items() if item["name"] == item_name), None)
-            if menu_item:
-                order_items.append({
-                    "name": item_name,
-                    "qty": qty,
-                    "price": menu_item["price"]
-                })
-        subtotal = sum(float(item["price"].replace("₹", "")) * item["qty"] for item in order_items)
-        tax = subtotal * 0.05
-        total = subtotal + tax
-        order_data = {
-            "items": order_items,
-            "special_instructions": special_instructions,
-            "total": total
-        }
-        print("Order successfully.", order_data)
-        # Send order to backend
-        try:
-            response = requests.post("http://127.0.0.1:5000/orders", json=order_data, timeout=5)
-            if response.status_code == 201:
-                print("Order sent to backend successfully.", order_data)
-                order_id = response.json().get("order_id")
-            else:
-                print(f"Backend error: {response.text}")
-                order_id = None
-        except Exception as e:
-            print(f"Failed to send order to backend: {e}")
-            order_id = None
+        job = self.cart_service.checkout_job
+        if job is None or not job.matches(cart_items, special_instructions):
+            job = CheckoutJob(cart_items, self.menu_service, special_instructions, journal=self.order_journal)
+            self.cart_service.checkout_job = job
+        self._start_checkout(job)
 
-        if order_id is None:
-            ctk.CTkLabel(self.main_frame, text="Order creation failed. Please try again.", font=ctk.CTkFont(size=14), text_color=self.colors["danger"]).pack(pady=10)
-            return
+    def _start_checkout(self, job):
+        job.start()
+        self.checkout_button.configure(state="disabled")
+        self._show_checkout_status("Starting checkout...", "Cancel", lambda: self._cancel_checkout(job))
+        self.checkout_poll_id += 1
+        self._poll_checkout(job, self.checkout_poll_id)
 
-        # Generate the invoice using the service
-        invoice_service = InvoiceGenerator(
-            cart_items=self.cart_service.get_all_items(),
-            menu_service=self.menu_service,
-            special_instructions=special_instructions,
-            order_id=order_id
-        )
-        invoice_path = invoice_service.generate_invoice()
+    def _cancel_checkout(self, job):
+        job.cancel()
+        self.checkout_poll_id += 1
+        self.checkout_status_frame.pack_forget()
+        self.checkout_button.configure(state="normal")
 
-        # Generate static QR code (e.g., payment link or static text)
-        qr_data = "upi://pay?pa=demo@upi&pn=Canteen&am={:.2f}&cu=INR".format(order_data["total"])
-        qr_img = qrcode.make(qr_data)
-        qr_path = os.path.join(os.getcwd(), "static_qr.png")
-        qr_img.save(qr_path)
+    def _show_checkout_status(self, text, action_text, action, error=False):
+        self.checkout_status_label.configure(
+            text=text,
+            text_color=self.colors["danger"] if error else self.colors["text_secondary"]
+        )
+        self.checkout_action_button.configure(text=action_text, command=action)
+        self.checkout_status_frame.pack(side="left", fill="x", expand=True)
 
-        self._show_checkout_success(invoice_path, qr_path, order_id)
+    def _poll_checkout(self, job, poll_id):
+        """Apply the checkout worker's progress events on the Tk loop"""
+        if self.is_destroyed or not self.main_frame.winfo_exists():
+            return  # the job keeps going; the next cart view picks it up from the cart service
+        if poll_id != self.checkout_poll_id:
+            return  # cancelled from the UI or restarted
+        while not job.events.empty():
+            event = job.events.get()
+            if event[0] == "progress":
+                self.checkout_status_label.configure(text=event[2])
+            elif event[0] == "failed":
+                message = "Order creation failed." if event[1] == "order" else "Checkout failed."
+                self._show_checkout_status(f"{message} Please try again.", "Retry", lambda: self._start_checkout(job), error=True)
+                self.checkout_button.configure(state="normal")
+                return
+            elif event[0] == "cancelled":
+                return
+            elif event[0] == "done":
+                self.checkout_status_frame.pack_forget()
+                self.checkout_button.configure(state="normal")
+                self.cart_service.checkout_job = None
+                self._show_checkout_success(job.invoice_path, job.qr_path, job.order_id)
+                return
+        self.main_frame.after(CHECKOUT_POLL_MS, lambda: self._poll_checkout(job, poll_id))
 
     def _show_checkout_success(self, invoice_path, qr_path=None, order_id=None):
         """Show checkout success dialog with QR code, poll for payment, then show invoice button"""
@@ -660,7 +723,9 @@ class CartView:
         ).pack(pady=(20, 15))
         ctk.CTkLabel(
             frame,
-            text="Your order has been confirmed. Please scan the QR code to pay.",
+            text=("Your order has been confirmed. Please scan the QR code to pay." if order_id is not None else
+                  "Your order is saved and will be sent to the kitchen as soon as the connection is back. "
+                  "Please scan the QR code to pay and show the payment at the counter."),
             font=ctk.CTkFont(size=14),
             wraplength=350
         ).pack(pady=(5,20))
@@ -687,7 +752,7 @@ class CartView:
             font=ctk.CTkFont(size=14, weight="bold"),
             height=38,
             corner_radius=8,
-            state="disabled"
+            state="disabled" if order_id is not None else "normal"
         )
         view_invoice_btn.pack(side="left", padx=10)
 
@@ -700,35 +765,65 @@ class CartView:
             font=ctk.CTkFont(size=14, weight="bold"),
             height=38,
             corner_radius=8,
-            state="disabled"
+            state="disabled" if order_id is not None else "normal"
         )
         close_btn.pack(side="right", padx=10)
 
-        def poll_payment():
-            try:
-                resp = requests.get(f"http://127.0.0.1:5000/orders/{order_id}/status", timeout=3)
-                if resp.status_code == 200 and resp.json().get("payment_status") == "paid":
-                    view_invoice_btn.configure(state="normal")
-                    close_btn.configure(state="normal")
-                    # Replace QR code with tick image
-                    if self.qr_label is not None:
-                        # Load the payment_succeeded.png image from static/
-                        try:
-                            tick_img_path = os.path.join(os.getcwd(), "static", "payment_succeeded.png")
-                            tick_img = Image.open(tick_img_path).resize((120, 120))
-                            tick_photo = ctk.CTkImage(light_image=tick_img, dark_image=tick_img, size=(120, 120))
-                            self.qr_label.configure(image=tick_photo, text="Payment Successful!", font=ctk.CTkFont(size=16, weight="bold"), compound="top")
-                            self.qr_label.image = tick_photo  # Prevent garbage collection
-                        except Exception as e:
-                            print(f"Failed to load tick image: {e}")
-                    ctk.CTkLabel(frame, text="Payment received! You can now view your invoice.", font=ctk.CTkFont(size=14), text_color=self.colors["success"]).pack(pady=5)
-                    return
-            except Exception as e:
-                print(f"Polling error: {e}")
-            # Poll every 2 seconds
-            success_window.after(2000, poll_payment)
+        paid = threading.Event()
+        stop_waiting = threading.Event()
+
+        def wait_for_payment():
+            # Long-poll the backend off the Tk thread; it answers as soon as the order is marked paid
+            while not stop_waiting.is_set():
+                try:
+                    resp = requests.get(
+                        f"http://127.0.0.1:5000/orders/{order_id}/status",
+                        params={"wait": 25},
+                        timeout=30
+                    )
+                    if resp.status_code == 200:
+                        if resp.json().get("payment_status") == "paid":
+                            paid.set()
+                            return
+                        continue
+                    print(f"Payment wait error: {resp.status_code}")
+                except Exception as e:
+                    print(f"Payment wait error: {e}")
+                # Back off before retrying so a failing backend isn't hammered
+                stop_waiting.wait(2)
+
+        def on_window_destroy(event):
+            if event.widget is success_window:
+                stop_waiting.set()
+
+        success_window.bind("<Destroy>", on_window_destroy, add="+")
+
+        def check_payment():
+            if not success_window.winfo_exists():
+                return
+            if paid.is_set():
+                view_invoice_btn.configure(state="normal")
+                close_btn.configure(state="normal")
+                # Replace QR code with tick image
+                if self.qr_label is not None:
+                    # Load the payment_succeeded.png image from static/
+                    try:
+                        tick_img_path = os.path.join(os.getcwd(), "static", "payment_succeeded.png")
+                        tick_img = Image.open(tick_img_path).resize((120, 120))
+                        tick_photo = ctk.CTkImage(light_image=tick_img, dark_image=tick_img, size=(120, 120))
+                        self.qr_label.configure(image=tick_photo, text="Payment Successful!", font=ctk.CTkFont(size=16, weight="bold"), compound="top")
+                        self.qr_label.image = tick_photo  # Prevent garbage collection
+                    except Exception as e:
+                        print(f"Failed to load tick image: {e}")
+                ctk.CTkLabel(frame, text="Payment received! You can now view your invoice.", font=ctk.CTkFont(size=14), text_color=self.colors["success"]).pack(pady=5)
+                return
+            # Checking a local flag is cheap; the network wait happens on the worker thread
+            success_window.after(200, check_payment)
 
-        poll_payment()
+        # A journaled order has no backend id yet, so there is no payment to wait for
+        if order_id is not None:
+            threading.Thread(target=wait_for_payment, daemon=True).start()
+            check_payment()
     
     def _open_invoice(self, invoice_path):
         """Open the invoice in the default PDF viewer"""
@@ -4,7 +4,15 @@ from PIL import Image, ImageTk
 import os
 import requests
 from io import BytesIO
-from services.image_cache import ImageCache
+from collections import OrderedDict
+from services.image_cache import ImageCache, DEFAULT_PRIORITY, VISIBLE_PRIORITY
+from .virtual_list import VirtualList
+
+# Categories with more items than this are shown in a windowed list that only
+# builds the cards near the viewport
+VIRTUALIZE_THRESHOLD = 100
+# Off-screen cards the windowed list keeps around for when they scroll back in
+VIRTUAL_CARD_POOL = 40
 
 class MenuView:
     def __init__(self, root, menu_service, cart_service, on_view_cart=None):
@@ -24,6 +32,20 @@ class MenuView:
         
         # Keep track of image labels for updating
         self.image_labels = {}
+        # Images still loading: label_id -> (url, callback, card frame)
+        self.image_requests = {}
+        self._prioritize_scheduled = False
+
+        # Cards are kept across filter changes: item id -> card, see _create_item_widget
+        self.cards = {}
+        self.shown_card_ids = []
+        self.no_items_label = None
+
+        # Windowed list for large categories, created on first use
+        self.virtual_list = None
+        self.virtual_mode = False
+        self.virtual_items = []
+        self.virtual_cards = OrderedDict()  # item id -> card, least recently shown first
         
         # Define color scheme
         self.colors = {
@@ -48,6 +70,34 @@ class MenuView:
         
         # Display all items initially
         self.filter_items("All")
+
+        # Pick up menu edits made while the kiosk is running
+        self.menu_listener_id = self.menu_service.add_listener(self._on_menu_update)
+
+    def _on_menu_update(self, diff):
+        """Menu changed (possibly on the refresher thread), redraw on the Tk loop"""
+        if self.scrollable_frame.winfo_exists():
+            self.scrollable_frame.after(0, lambda: self._refresh_menu(diff))
+        else:
+            self.menu_service.remove_listener(self.menu_listener_id)
+
+    def _refresh_menu(self, diff):
+        if not self.scrollable_frame.winfo_exists():
+            return
+        # Changed items get a fresh card; unchanged cards are reused as they are
+        if self.virtual_mode:
+            self.virtual_list.set_count(0)  # release placed cards before destroying any
+        stale_ids = [item["id"] for item in diff["updated"]] + diff["removed"]
+        for item_id in stale_ids:
+            for pool in (self.cards, self.virtual_cards):
+                card = pool.pop(item_id, None)
+                if card:
+                    self._destroy_card(card)
+        categories = self.menu_service.get_categories()
+        self.category_buttons.configure(values=categories)
+        if self.selected_category.get() not in categories:
+            self.selected_category.set("All")
+        self.filter_items(self.selected_category.get())
         
     def _create_header(self):
         header_frame = customtkinter.CTkFrame(self.root, fg_color="transparent", corner_radius=0)
@@ -124,7 +174,7 @@ class MenuView:
         categories = self.menu_service.get_categories()
         self.selected_category = tkinter.StringVar(value="All")
         
-        segmented_button = customtkinter.CTkSegmentedButton(
+        self.category_buttons = customtkinter.CTkSegmentedButton(
             filter_frame,
             values=categories,
             variable=self.selected_category,
@@ -137,11 +187,11 @@ class MenuView:
             height=36,
             corner_radius=8
         )
-        segmented_button.pack(fill="x")
+        self.category_buttons.pack(fill="x")
         
     def _create_scrollable_frame(self):
         # Menu items title
-        items_label = customtkinter.CTkLabel(
+        self.items_label = items_label = customtkinter.CTkLabel(
             self.root, 
             text="Menu Items", 
             font=customtkinter.CTkFont(size=18, weight="bold"),  # Match section title sizes
@@ -157,73 +207,200 @@ class MenuView:
             height=300  # Match cart view height
         )
         self.scrollable_frame.pack(padx=25, pady=(0, 20), fill="both", expand=True)
+
+        # Re-rank pending image loads whenever the visible region moves
+        self.scrollable_frame._parent_canvas.configure(yscrollcommand=self._on_menu_scroll)
+
+    def _on_menu_scroll(self, first, last):
+        self.scrollable_frame._scrollbar.set(first, last)
+        if not self._prioritize_scheduled:
+            self._prioritize_scheduled = True
+            self.scrollable_frame.after(100, self._prioritize_visible_images)
+
+    def _prioritize_visible_images(self):
+        """Move images for cards inside the viewport to the front of the download queue"""
+        self._prioritize_scheduled = False
+        if not self.scrollable_frame.winfo_exists():
+            return
+        canvas = self.scrollable_frame._parent_canvas
+        top = canvas.canvasy(0)
+        bottom = canvas.canvasy(canvas.winfo_height())
+        visible = []
+        for url, _, card in list(self.image_requests.values()):
+            # Windowed list cards are requested at visible priority when placed
+            if card.winfo_exists() and card.master is self.scrollable_frame:
+                card_top = card.winfo_y()
+                if card_top < bottom and card_top + card.winfo_height() > top:
+                    visible.append((card_top, url))
+        # Top of the screen first
+        for _, url in sorted(visible):
+            self.image_cache.prioritize(url, VISIBLE_PRIORITY)
+
+    def _cancel_image_requests(self, cards):
+        """Drop pending image loads for cards being hidden or destroyed"""
+        for card in cards:
+            request = self.image_requests.pop(card["label_id"], None)
+            if request:
+                url, callback, _ = request
+                self.image_cache.cancel(url, callback)
+                card["needs_image"] = True
+
+    def _destroy_card(self, card):
+        self._cancel_image_requests([card])
+        self.image_labels.pop(card["label_id"], None)
+        card["frame"].destroy()
+
+    def _request_card_image(self, card, item, priority=DEFAULT_PRIORITY):
+        image = self._load_image_from_url(item["image_url"], size=(120, 120), label_id=card["label_id"],
+                                          card=card["frame"], priority=priority)
+        card["needs_image"] = False
+        if image is not self.placeholder_image:
+            card["image_label"].configure(image=image)
         
     def filter_items(self, category):
-        # Clear image label references for the old view
-        self.image_labels = {}
-        
-        # Clear current items
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
+        """Show the cards for a category, reusing cards built for earlier filters"""
+        filtered_items = self.menu_service.get_items_by_category(category)
+        virtual = len(filtered_items) > VIRTUALIZE_THRESHOLD
+        wanted_ids = set() if virtual else {item["id"] for item in filtered_items}
+
+        # Hide the current cards; ones leaving the view give up their pending image loads
+        leaving = [self.cards[item_id] for item_id in self.shown_card_ids
+                   if item_id not in wanted_ids and item_id in self.cards]
+        self._cancel_image_requests(leaving)
+        for item_id in self.shown_card_ids:
+            if item_id in self.cards:
+                self.cards[item_id]["frame"].pack_forget()
+        if self.no_items_label:
+            self.no_items_label.pack_forget()
+        self.shown_card_ids = []
+
+        if virtual:
+            self._show_virtual_list(filtered_items)
+            return
+        self._hide_virtual_list()
         
         # Scroll to top when filter changes
         if hasattr(self.scrollable_frame, '_parent_canvas'):
             self.scrollable_frame._parent_canvas.yview_moveto(0)
-
-        # Get filtered items
-        filtered_items = self.menu_service.get_items_by_category(category)
         
         # Show message if no items
         if not filtered_items:
-            no_items_label = customtkinter.CTkLabel(
-                self.scrollable_frame, 
-                text=f"No items available in {category} category",
-                font=customtkinter.CTkFont(size=14),
-                text_color=self.colors["text_secondary"]
-            )
-            no_items_label.pack(pady=30)
+            if self.no_items_label is None:
+                self.no_items_label = customtkinter.CTkLabel(
+                    self.scrollable_frame, 
+                    font=customtkinter.CTkFont(size=14),
+                    text_color=self.colors["text_secondary"]
+                )
+            self.no_items_label.configure(text=f"No items available in {category} category")
+            self.no_items_label.pack(pady=30)
             return
             
-        # Create new menu items in a grid layout
-        for i, item in enumerate(filtered_items):
-            self._create_item_widget(item)
+        # Pack order is display order, so re-packing puts the cards in menu order
+        for item in filtered_items:
+            card = self.cards.get(item["id"])
+            if card is None:
+                card = self._create_item_widget(item)
+                self.cards[item["id"]] = card
+            else:
+                # The quantity may have changed on another card or in the cart meanwhile
+                self._sync_card_quantity(card)
+                if card["needs_image"]:
+                    self._request_card_image(card, item)
+            card["frame"].pack(fill="x", padx=5, pady=4)
+        self.shown_card_ids = [item["id"] for item in filtered_items]
+
+        # Once laid out, load the cards on screen before the rest
+        self.scrollable_frame.after_idle(self._prioritize_visible_images)
+    
+    def _show_virtual_list(self, items):
+        if self.virtual_list is None:
+            self.virtual_list = VirtualList(
+                self.root,
+                render_row=self._render_virtual_card,
+                release_row=self._release_virtual_card,
+                corner_radius=12
+            )
+        if not self.virtual_mode:
+            self.scrollable_frame.pack_forget()
+            self.virtual_list.pack(padx=25, pady=(0, 20), fill="both", expand=True, after=self.items_label)
+            self.virtual_mode = True
+        # Release the rows of the old item list before swapping it out
+        self.virtual_list.set_count(0)
+        self.virtual_items = items
+        self.virtual_list.set_count(len(items))
+
+    def _hide_virtual_list(self):
+        if not self.virtual_mode:
+            return
+        self.virtual_list.set_count(0)
+        self.virtual_list.pack_forget()
+        self.scrollable_frame.pack(padx=25, pady=(0, 20), fill="both", expand=True, after=self.items_label)
+        self.virtual_mode = False
+
+    def _render_virtual_card(self, index, parent):
+        item = self.virtual_items[index]
+        card = self.virtual_cards.get(item["id"])
+        if card is None:
+            card = self._create_item_widget(item, parent, priority=VISIBLE_PRIORITY)
+            self.virtual_cards[item["id"]] = card
+        else:
+            self.virtual_cards.move_to_end(item["id"])
+            self._sync_card_quantity(card)
+            if card["needs_image"]:
+                self._request_card_image(card, item, priority=VISIBLE_PRIORITY)
+        return card["frame"]
+
+    def _release_virtual_card(self, index, frame):
+        card = self.virtual_cards.get(self.virtual_items[index]["id"])
+        if card:
+            self._cancel_image_requests([card])
+        # Keep a bounded pool of off-screen cards, dropping the least recently shown
+        for item_id in list(self.virtual_cards):
+            if len(self.virtual_cards) <= VIRTUAL_CARD_POOL:
+                break
+            if not self.virtual_cards[item_id]["frame"].winfo_manager():
+                self._destroy_card(self.virtual_cards.pop(item_id))
     
-    def _load_image_from_url(self, url, size=(120, 120), label_id=None):
+    def _load_image_from_url(self, url, size=(120, 120), label_id=None, card=None, priority=DEFAULT_PRIORITY):
         """Load an image from a URL using the image cache service"""
         def update_callback(image):
-            # This callback is called when an image is loaded
+            # Called on the Tk loop by the image cache's completion pump
+            self.image_requests.pop(label_id, None)
             if label_id and label_id in self.image_labels and hasattr(self, 'root') and self.root.winfo_exists():
                 try:
                     label = self.image_labels[label_id]
                     if label.winfo_exists():
-                        print(f"Updating label with image: {url}")
                         label.configure(image=image)
-                        self.root.update_idletasks()
                 except Exception as e:
                     print(f"Error updating image in callback: {e}")
         
-        return self.image_cache.get_image(url, size, update_callback, self.placeholder_image)
+        image = self.image_cache.get_image(url, size, update_callback, self.placeholder_image, priority=priority)
+        if image is self.placeholder_image and card is not None:
+            # Still loading, remember it so it can be re-prioritized or cancelled
+            self.image_requests[label_id] = (url, update_callback, card)
+        return image
     
-    def _create_item_widget(self, item):
+    def _create_item_widget(self, item, parent=None, priority=DEFAULT_PRIORITY):
+        """Build an item's card, unpacked; returns the card dict kept in self.cards"""
         # Create a card-like frame with shadow effect
         item_frame = customtkinter.CTkFrame(
-            self.scrollable_frame, 
+            parent or self.scrollable_frame, 
             corner_radius=12,
             fg_color=self.colors["card_bg"],
             border_width=1,
             border_color=("#E0E0E0", "#3A3A3A")
         )
-        item_frame.pack(fill="x", padx=5, pady=4)
         
         # Configure grid for flexible layout
         item_frame.grid_columnconfigure(1, weight=1)
         
-        # Generate a unique ID for this image label
-        label_id = f"img_{item['name']}_{id(item)}"
+        # Unique per card: the filtered list and the windowed list can each hold a card for the same item
+        label_id = f"img_{id(item_frame)}"
         
         # Item image with rounded corners and proper aspect ratio
         if "image_url" in item:
-            item_image = self._load_image_from_url(item["image_url"], size=(120, 120), label_id=label_id)
+            item_image = self._load_image_from_url(item["image_url"], size=(120, 120), label_id=label_id,
+                                                   card=item_frame, priority=priority)
         else:
             item_image = self.placeholder_image
         
@@ -334,18 +511,43 @@ class MenuView:
         if quantity > 0:
             self._create_quantity_selector(action_container, item["name"])
         else:
-            add_btn = customtkinter.CTkButton(
-                action_container, 
-                text="Add to Cart",
-                font=customtkinter.CTkFont(size=13, weight="bold"),
-                width=100,
-                height=36,
-                fg_color=self.colors["primary"],
-                hover_color=self.colors["secondary"],
-                corner_radius=8,
-                command=lambda name=item["name"]: self._add_initial(name, action_container)
-            )
-            add_btn.pack(pady=5)
+            self._create_add_button(action_container, item["name"])
+
+        return {"frame": item_frame, "label_id": label_id, "image_label": image_label, "needs_image": False,
+                "item_name": item["name"], "action_container": action_container}
+
+    def _create_add_button(self, container, item_name):
+        add_btn = customtkinter.CTkButton(
+            container, 
+            text="Add to Cart",
+            font=customtkinter.CTkFont(size=13, weight="bold"),
+            width=100,
+            height=36,
+            fg_color=self.colors["primary"],
+            hover_color=self.colors["secondary"],
+            corner_radius=8,
+            command=lambda: self._add_initial(item_name, container)
+        )
+        add_btn.pack(pady=5)
+
+    def _sync_card_quantity(self, card):
+        """Bring a reused card's Add to Cart button or quantity selector in line with the cart"""
+        container = card["action_container"]
+        quantity = self.cart_service.get_quantity(card["item_name"])
+        shown = 0  # the card shows the Add to Cart button
+        for child in container.winfo_children():
+            if not isinstance(child, customtkinter.CTkButton):
+                labels = [w for w in child.winfo_children() if isinstance(w, customtkinter.CTkLabel)]
+                if labels:
+                    shown = int(labels[0].cget("text"))
+        if shown == quantity:
+            return
+        if quantity > 0:
+            self._create_quantity_selector(container, card["item_name"])
+        else:
+            for child in container.winfo_children():
+                child.destroy()
+            self._create_add_button(container, card["item_name"])
             
     def _create_quantity_selector(self, frame, item_name):
         """Create a quantity selector with plus/minus buttons"""
@@ -405,18 +607,7 @@ class MenuView:
                     container.destroy()
                     
                     if hasattr(container, 'master') and container.master.winfo_exists():
-                        add_btn = customtkinter.CTkButton(
-                            container.master, 
-                            text="Add to Cart",
-                            font=customtkinter.CTkFont(size=13, weight="bold"),
-                            width=100,
-                            height=36,
-                            fg_color=self.colors["primary"],
-                            hover_color=self.colors["secondary"],
-                            corner_radius=8,
-                            command=lambda: self._add_initial(item_name, container.master)
-                        )
-                        add_btn.pack(pady=5)
+                        self._create_add_button(container.master, item_name)
                 self.cart_service.update_quantity(item_name, 0)
             else:
                 self.cart_service.update_quantity(item_name, new_qty)
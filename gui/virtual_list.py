@@ -0,0 +1,171 @@
+import bisect
+import sys
+import tkinter
+import customtkinter
+
+
+class VirtualList(customtkinter.CTkFrame):
+    """
+    Scrollable list that only materializes the rows in (and just around) the
+    viewport. Rows are placed at their offset inside a viewport-sized frame,
+    so neither memory nor layout work grows with the number of rows.
+
+    render_row(index, parent) returns the widget for a row; release_row(index,
+    widget) is called when that row scrolls out so the widget can be hidden
+    and reused. Row heights start at estimated_row_height and are corrected
+    as rows are measured.
+    """
+
+    def __init__(self, master, render_row, release_row=None, estimated_row_height=160, overscan=2,
+                 on_scroll=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.render_row = render_row
+        self.release_row = release_row
+        self.estimated_row_height = estimated_row_height
+        self.overscan = overscan
+        self.on_scroll = on_scroll
+
+        self.count = 0
+        self.offset = 0  # pixels scrolled from the top
+        self._heights = []
+        self._tops = [0]  # prefix sums of _heights: _tops[i] is where row i starts
+        self._rows = {}  # index -> placed widget
+        self._relayout_scheduled = False
+
+        self.viewport = customtkinter.CTkFrame(self, fg_color="transparent", corner_radius=0)
+        self.viewport.pack(side="left", fill="both", expand=True)
+        self.scrollbar = customtkinter.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.viewport.bind("<Configure>", lambda e: self._schedule_relayout())
+        # Wheel events go to whatever row widget is under the pointer, so listen
+        # on "all"; the bindings are removed again in destroy()
+        sequences = ["<Button-4>", "<Button-5>"] if sys.platform.startswith("linux") else ["<MouseWheel>"]
+        self._wheel_bindings = [(sequence, self.bind_all(sequence, self._on_mouse_wheel, add=True))
+                                for sequence in sequences]
+
+    def destroy(self):
+        for sequence, funcid in self._wheel_bindings:
+            # unbind_all would also drop other widgets' wheel handlers (CTkScrollableFrame binds on "all" too)
+            script = self.tk.call("bind", "all", sequence)
+            self.tk.call("bind", "all", sequence,
+                         "\n".join(line for line in script.split("\n") if funcid not in line))
+            self.deletecommand(funcid)
+        self._wheel_bindings = []
+        super().destroy()
+
+    def set_count(self, count):
+        """Show a new set of rows, scrolled to the top"""
+        for index, widget in list(self._rows.items()):
+            self._release(index, widget)
+        self.count = count
+        self.offset = 0
+        self._heights = [self.estimated_row_height] * count
+        self._rebuild_tops()
+        self._relayout()
+
+    def visible_range(self):
+        """Indices of the rows currently materialized (viewport plus overscan)"""
+        return sorted(self._rows)
+
+    def _rebuild_tops(self):
+        tops = [0]
+        for height in self._heights:
+            tops.append(tops[-1] + height)
+        self._tops = tops
+
+    def _total_height(self):
+        return self._tops[-1]
+
+    def _max_offset(self):
+        return max(0, self._total_height() - self.viewport.winfo_height())
+
+    def _release(self, index, widget):
+        del self._rows[index]
+        widget.place_forget()
+        if self.release_row:
+            self.release_row(index, widget)
+
+    def _schedule_relayout(self):
+        if not self._relayout_scheduled:
+            self._relayout_scheduled = True
+            self.after_idle(self._relayout)
+
+    def _relayout(self):
+        self._relayout_scheduled = False
+        if not self.winfo_exists():
+            return
+        viewport_height = max(self.viewport.winfo_height(), 1)
+        self.offset = max(0, min(self.offset, self._max_offset()))
+
+        first = max(0, bisect.bisect_right(self._tops, self.offset) - 1 - self.overscan)
+        last = min(self.count, bisect.bisect_left(self._tops, self.offset + viewport_height) + self.overscan)
+        wanted = range(first, last)
+
+        for index, widget in list(self._rows.items()):
+            if index not in wanted:
+                self._release(index, widget)
+
+        remeasured = False
+        rendered = False
+        for index in wanted:
+            widget = self._rows.get(index)
+            if widget is None:
+                widget = self.render_row(index, self.viewport)
+                self._rows[index] = widget
+                rendered = True
+            widget.place(x=0, y=self._tops[index] - self.offset, relwidth=1.0)
+            height = widget.winfo_reqheight()
+            if height > 1 and height != self._heights[index]:
+                self._heights[index] = height
+                remeasured = True
+
+        if remeasured:
+            # Heights were estimates; place again with the measured ones
+            self._rebuild_tops()
+            for index, widget in self._rows.items():
+                widget.place(x=0, y=self._tops[index] - self.offset, relwidth=1.0)
+
+        total = self._total_height()
+        if total > 0:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + viewport_height) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        if self.on_scroll:
+            self.on_scroll()
+        if rendered:
+            # New rows only report their real height after Tk lays them out
+            self._schedule_relayout()
+
+    def scroll_to(self, offset):
+        self.offset = max(0, min(int(offset), self._max_offset()))
+        self._schedule_relayout()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        """Scrollbar protocol: ("moveto", fraction) or ("scroll", n, "units"|"pages")"""
+        if action == "moveto":
+            self.scroll_to(float(amount) * self._total_height())
+        elif unit == "pages":
+            self.scroll_to(self.offset + int(amount) * self.viewport.winfo_height())
+        else:
+            self.scroll_to(self.offset + int(amount) * self.estimated_row_height // 4)
+
+    def _on_mouse_wheel(self, event):
+        try:
+            if not self.winfo_exists() or not self.winfo_ismapped():
+                return
+            widget = self.winfo_containing(event.x_root, event.y_root)
+        except (tkinter.TclError, KeyError):
+            return
+        # Only scroll when the pointer is over this list
+        while widget is not None and widget is not self:
+            widget = widget.master
+        if widget is None:
+            return
+        if sys.platform.startswith("linux"):
+            steps = -1 if event.num == 4 else 1
+        elif sys.platform == "darwin":
+            steps = -event.delta
+        else:
+            steps = -int(event.delta / 120)
+        self.scroll_to(self.offset + steps * self.estimated_row_height // 4)
@@ -1,10 +1,67 @@
+import builtins
+import sys
+import threading
+import time
+
+PROFILE_FLAG = "--profile-startup"
+
+
+class StartupProfiler:
+    """
+    Times first-time imports and the time to the first painted frame, for
+    `python main.py --profile-startup`. Imports are attributed to the
+    outermost import statement, so each figure includes its dependencies.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.imports = {}
+        self._local = threading.local()
+        self._original_import = builtins.__import__
+
+    def install(self):
+        builtins.__import__ = self._timed_import
+
+    def uninstall(self):
+        builtins.__import__ = self._original_import
+
+    def _timed_import(self, name, *args, **kwargs):
+        if name in sys.modules:
+            return self._original_import(name, *args, **kwargs)
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        started = time.perf_counter()
+        try:
+            return self._original_import(name, *args, **kwargs)
+        finally:
+            self._local.depth = depth
+            if depth == 0:
+                self.imports[name] = self.imports.get(name, 0.0) + time.perf_counter() - started
+
+    def report(self, label):
+        elapsed = (time.perf_counter() - self.start) * 1000
+        import_time = sum(self.imports.values()) * 1000
+        print(f"[startup] {label}: {elapsed:.1f} ms since launch, {import_time:.1f} ms in imports")
+        slowest = sorted(self.imports.items(), key=lambda item: item[1], reverse=True)[:10]
+        for name, seconds in slowest:
+            print(f"[startup]   {seconds * 1000:8.1f} ms  import {name}")
+
+
+profiler = StartupProfiler() if PROFILE_FLAG in sys.argv else None
+if profiler:
+    profiler.install()
+
 import customtkinter
 import os
 
-from services import MenuService, CartService, ImageCache, AuthService
-from gui import MenuView, CartView
+# Only what the login screen needs; the menu/cart views, ImageCache (requests)
+# and checkout (qrcode, invoices) are imported once they are used
+from services import MenuService, CartService, AuthService, OrderJournal
 from gui.login import LoginView
 
+# Image loading starts after the login screen has painted
+IMAGE_PRELOAD_DELAY_MS = 100
+
 class CanteenApp:
     def __init__(self):
         # Set appearance settings
@@ -25,9 +82,16 @@ class CanteenApp:
         
         # Initialize services
         self.menu_service = MenuService()
+        self.menu_service.start_auto_refresh()  # Pick up menu edits from the admin app
         self.cart_service = CartService()
-        self.image_cache = ImageCache()  # Initialize global image cache
+        self.image_cache = None  # Created after the first paint, see _get_image_cache
         self.auth_service = AuthService()  # Add AuthService
+        # Orders placed while the backend is down are journaled and sent once it is back
+        self.order_journal = OrderJournal()
+        self.order_journal.start_sync()
+        # Coalesce cart/menu notifications into one delivery per frame on the Tk loop
+        self.cart_service.attach_tk(self.app)
+        self.menu_service.attach_tk(self.app)
         
         # Create view container frame 
         self.container_frame = customtkinter.CTkFrame(self.app)
@@ -37,6 +101,22 @@ class CanteenApp:
 
         # Start with login view
         self.show_login_view()
+
+        if profiler:
+            self.app.after(0, self._report_first_paint)
+
+    def _report_first_paint(self):
+        self.app.update_idletasks()  # flush the pending draw of the login screen
+        profiler.report("first paint")
+        profiler.uninstall()
+
+    def _get_image_cache(self):
+        """Create the global image cache on first use, with callbacks delivered on the Tk loop"""
+        if self.image_cache is None:
+            from services import ImageCache
+            self.image_cache = ImageCache()
+            self.image_cache.attach_tk(self.app)
+        return self.image_cache
     
     def clear_container(self):
         """Clear the container frame for view switching"""
@@ -45,12 +125,13 @@ class CanteenApp:
     
     def preload_menu_images(self):
         """Preload all menu item images in the background while user is logging in."""
-        items = self.menu_service.get_all_items()
-        for item in items:
-            url = item.get("image_url")
-            if url:
-                # Preload with default menu image size (used in MenuView)
-                self.image_cache.get_image(url, size=(120, 120))
+        urls = [item["image_url"] for item in self.menu_service.get_all_items() if item.get("image_url")]
+        # Default menu image size (used in MenuView); decoding happens off the Tk thread
+        self._get_image_cache().warm_up(urls, (120, 120), self.app, on_progress=self._on_preload_progress)
+
+    def _on_preload_progress(self, done, total):
+        if done == total:
+            print(f"Preloaded {total} menu images")
     
     def show_login_view(self):
         """Switch to login view and start preloading menu images."""
@@ -60,11 +141,13 @@ class CanteenApp:
             self.auth_service,
             on_login_success=self.show_menu_view
         )
-        # Start preloading images in the background
-        self.preload_menu_images()
+        # Start preloading images in the background once the screen is up
+        self.app.after(IMAGE_PRELOAD_DELAY_MS, self.preload_menu_images)
 
     def show_menu_view(self, user=None):
         """Switch to menu view (after login)"""
+        from gui import MenuView
+        self._get_image_cache()
         self.clear_container()
         self.menu_view = MenuView(
             self.container_frame, 
@@ -75,8 +158,11 @@ class CanteenApp:
 
     def on_close(self):
         """Handle application close event"""
+        self.menu_service.stop_auto_refresh()
+        self.order_journal.stop_sync()
+
         # Shut down the image cache background thread
-        if hasattr(self, 'image_cache'):
+        if self.image_cache is not None:
             self.image_cache.shutdown()
         
         # Close the app
@@ -84,12 +170,14 @@ class CanteenApp:
     
     def show_cart_view(self):
         """Switch to cart view"""
+        from gui import CartView
         self.clear_container()
         self.cart_view = CartView(
             self.container_frame,
             self.cart_service,
             self.menu_service,
-            on_back_to_menu=self.show_menu_view
+            on_back_to_menu=self.show_menu_view,
+            order_journal=self.order_journal
         )
     
     def run(self):
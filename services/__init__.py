@@ -1,5 +1,23 @@
-from .menu_service import MenuService
-from .cart_service import CartService
-from .invoice_service import InvoiceGenerator
-from .image_cache import ImageCache
-from .auth_service import AuthService
\ No newline at end of file
+import importlib
+
+# Services are imported on first use so the kiosk's login screen doesn't wait
+# on requests/PIL (ImageCache) or the invoice and checkout code
+_SERVICES = {
+    "MenuService": ".menu_service",
+    "CartService": ".cart_service",
+    "InvoiceGenerator": ".invoice_service",
+    "CheckoutJob": ".checkout_service",
+    "OrderJournal": ".order_journal",
+    "ImageCache": ".image_cache",
+    "AuthService": ".auth_service",
+}
+
+__all__ = list(_SERVICES)
+
+
+def __getattr__(name):
+    if name not in _SERVICES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_SERVICES[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -1,14 +1,20 @@
+from .notifier import ChangeNotifier
+
+
 class CartService:
     def __init__(self):
         self.cart_items = {}  # Dictionary to store item_name: quantity
-        self.listeners = []   # List of callback functions to notify on cart changes
-        self.next_listener_id = 0  # For tracking listeners to enable removal
+        # Listeners get the set of item names changed since their last notification
+        self.notifier = ChangeNotifier(_merge_changed_names, name="cart listener")
+        # The current or last unfinished CheckoutJob; kept here rather than on
+        # the cart view so it survives leaving and reopening the cart
+        self.checkout_job = None
     
     def add_item(self, item_name, quantity=1):
         """Add an item to the cart"""
         current_qty = self.cart_items.get(item_name, 0)
         self.cart_items[item_name] = current_qty + quantity
-        self._notify_listeners()
+        self._notify_listeners(item_name)
     
     def update_quantity(self, item_name, quantity):
         """Update the quantity of an item in the cart"""
@@ -17,7 +23,7 @@ class CartService:
                 del self.cart_items[item_name]
         else:
             self.cart_items[item_name] = quantity
-        self._notify_listeners()
+        self._notify_listeners(item_name)
     
     def get_quantity(self, item_name):
         """Get the quantity of an item in the cart"""
@@ -33,30 +39,33 @@ class CartService:
     
     def clear_cart(self):
         """Clear all items from the cart"""
+        removed = list(self.cart_items)
         self.cart_items = {}
-        self._notify_listeners()
+        self._notify_listeners(*removed)
     
     def add_listener(self, callback):
-        """Add a listener to be notified when the cart changes"""
-        listener_id = self.next_listener_id
-        self.next_listener_id += 1
-        self.listeners.append((listener_id, callback))
-        return listener_id
+        """
+        Add a listener to be notified when the cart changes.
+        It is called with the set of item names that changed.
+        """
+        return self.notifier.add_listener(callback)
     
     def remove_listener(self, listener_id):
         """Remove a listener by its ID"""
-        self.listeners = [(lid, callback) for lid, callback in self.listeners if lid != listener_id]
-    
-    def _notify_listeners(self):
-        """Notify all listeners that the cart has changed"""
-        # Create a copy of listeners to avoid issues if a listener gets removed during notification
-        listeners_copy = self.listeners.copy()
-        
-        for lid, callback in listeners_copy:
-            try:
-                # Only notify if the listener still exists
-                if lid in [l[0] for l in self.listeners]:
-                    callback(self.cart_items)
-            except Exception as e:
-                print(f"Error notifying listener {lid}: {e}")
-                # Don't remove the listener automatically - could be a temporary error
+        self.notifier.remove_listener(listener_id)
+    
+    def batch(self):
+        """Group several cart changes into one notification: with cart.batch(): ..."""
+        return self.notifier.batch()
+    
+    def attach_tk(self, tk_widget):
+        """Deliver cart notifications on the Tk loop, at most once per frame"""
+        self.notifier.attach_tk(tk_widget)
+    
+    def _notify_listeners(self, *item_names):
+        """Notify listeners that these items changed"""
+        self.notifier.notify(set(item_names))
+
+
+def _merge_changed_names(pending, item_names):
+    return item_names if pending is None else pending | item_names
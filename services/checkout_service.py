@@ -0,0 +1,179 @@
+import os
+import queue
+import threading
+import uuid
+
+import requests
+
+from .invoice_service import InvoiceGenerator
+from .pricing import calculate_tax_paise, format_paise
+
+ORDERS_URL = "http://127.0.0.1:5000/orders"
+ORDER_TIMEOUT = 5  # seconds to wait for the backend to accept an order
+
+# Run in order; a retry starts again at the first stage that hasn't finished
+CHECKOUT_STAGES = [
+    ("order", "Sending order..."),
+    ("invoice", "Generating invoice..."),
+    ("qr", "Preparing payment QR code..."),
+]
+
+
+class CheckoutJob:
+    """
+    One checkout run on a worker thread: send the order to the backend, write
+    the invoice, then render the payment QR code.
+
+    The job works on a copy of the cart taken when it is created. Progress is
+    reported as tuples on ``events``, which the UI drains from the Tk loop:
+    ("progress", stage, label), ("failed", stage, message), ("cancelled",) and
+    ("done",). Results are kept on the job, so a retry after a failure (or a
+    restart after cancel) picks up where it stopped instead of placing the
+    order twice. The order carries an idempotency key generated with the job,
+    so the backend stores it once even if a request that timed out did reach it.
+
+    With a ``journal`` (OrderJournal), an order the backend can't take because
+    it is unreachable or erroring is journaled for later delivery instead of
+    failing the checkout; ``journal_key`` is then set and ``order_id`` stays None.
+    """
+
+    def __init__(self, cart_items, menu_service, special_instructions="", journal=None):
+        self.cart_items = dict(cart_items)
+        self.menu_service = menu_service
+        self.special_instructions = special_instructions
+        self.journal = journal
+        self.idempotency_key = uuid.uuid4().hex
+        self.events = queue.SimpleQueue()
+        self.order_id = None
+        self.order_items = None  # priced lines sent with the order, reused by the invoice
+        self.journal_key = None
+        self.invoice_path = None
+        self.qr_path = None
+        self.total_paise = 0
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def matches(self, cart_items, special_instructions):
+        """Whether this job was created for the same cart and instructions"""
+        return self.cart_items == dict(cart_items) and self.special_instructions == special_instructions
+
+    def start(self):
+        """Start the job, or resume it after a failure or cancel"""
+        with self._lock:
+            # Events left over from an earlier run are stale
+            while True:
+                try:
+                    self.events.get_nowait()
+                except queue.Empty:
+                    break
+            self._cancel.clear()
+            # A cancelled run may still be waiting on the backend; it just carries on
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    retry = start
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def cancel(self):
+        """Stop after the current stage; a request already sent can't be taken back"""
+        self._cancel.set()
+
+    def _run(self):
+        for stage, label in CHECKOUT_STAGES:
+            if self._stage_done(stage):
+                continue
+            with self._lock:
+                if self._cancel.is_set():
+                    self._thread = None
+                    self.events.put(("cancelled",))
+                    return
+            self.events.put(("progress", stage, label))
+            try:
+                getattr(self, f"_{stage}_stage")()
+            except Exception as e:
+                print(f"Error during checkout ({stage}): {e}")
+                with self._lock:
+                    self._thread = None
+                    self.events.put(("failed", stage, str(e)))
+                return
+        with self._lock:
+            self._thread = None
+            self.events.put(("done",))
+
+    def _stage_done(self, stage):
+        if stage == "order":
+            return self.order_id is not None or self.journal_key is not None
+        return {"invoice": self.invoice_path, "qr": self.qr_path}[stage] is not None
+
+    def _order_stage(self):
+        order_items = []
+        for item_name, qty in self.cart_items.items():
+            menu_item = self.menu_service.get_item(item_name)
+            if menu_item:
+                order_items.append({
+                    "id": menu_item["id"],
+                    "name": item_name,
+                    "qty": qty,
+                    "price": menu_item["price"],
+                    "price_paise": menu_item["price_paise"]
+                })
+        # Prices are taken once here; the invoice reuses these lines even if the menu reloads meanwhile
+        self.order_items = order_items
+        subtotal = sum(item["price_paise"] * item["qty"] for item in order_items)
+        total_paise = subtotal + calculate_tax_paise(subtotal)
+        order_data = {
+            "items": order_items,
+            "special_instructions": self.special_instructions,
+            "total": total_paise / 100
+        }
+        try:
+            response = requests.post(ORDERS_URL, json=order_data, timeout=ORDER_TIMEOUT,
+                                     headers={"Idempotency-Key": self.idempotency_key})
+        except requests.RequestException as e:
+            if self.journal is None:
+                raise
+            print(f"Backend unreachable, journaling order: {e}")
+            self._journal_order(order_data, total_paise)
+            return
+        if response.status_code >= 500 and self.journal is not None:
+            print(f"Backend error {response.status_code}, journaling order")
+            self._journal_order(order_data, total_paise)
+            return
+        # 200 means the backend already had this order from an earlier attempt
+        if response.status_code not in (200, 201):
+            raise RuntimeError(f"backend returned {response.status_code}: {response.text}")
+        order_id = response.json().get("order_id")
+        if order_id is None:
+            raise RuntimeError("backend did not return an order id")
+        print("Order sent to backend successfully.", order_data)
+        self.total_paise = total_paise
+        self.order_id = order_id
+
+    def _journal_order(self, order_data, total_paise):
+        # Same key as the live attempt, in case that one was stored after all
+        self.journal_key = self.journal.append(order_data, idempotency_key=self.idempotency_key)
+        self.total_paise = total_paise
+
+    def _invoice_stage(self):
+        invoice_service = InvoiceGenerator(
+            cart_items=self.cart_items,
+            menu_service=self.menu_service,
+            special_instructions=self.special_instructions,
+            order_id=self.order_id,
+            order_items=self.order_items
+        )
+        self.invoice_path = invoice_service.generate_invoice()
+
+    def _qr_stage(self):
+        import qrcode
+
+        # Static UPI payment link for the order total
+        qr_data = "upi://pay?pa=demo@upi&pn=Canteen&am={}&cu=INR".format(format_paise(self.total_paise).lstrip("₹"))
+        qr_path = os.path.join(os.getcwd(), "static_qr.png")
+        qrcode.make(qr_data).save(qr_path)
+        self.qr_path = qr_path
@@ -0,0 +1,171 @@
+import json
+import mmap
+import os
+import threading
+from io import BytesIO
+
+from PIL import Image, features
+
+
+class ImageArchive:
+    """
+    Packs cached thumbnails into one data file that is read through a single
+    memory map, instead of one PNG per image that has to be opened and decoded.
+
+    ``<path>.pack`` holds the image bytes back to back. ``<path>.idx`` is an
+    append-only log of JSON lines {key, offset, length, format, mode, width,
+    height}; the last line for a key wins and a {key, deleted} line removes
+    it. Images are stored as raw pixels, or as WebP when ``compress`` is set
+    and Pillow supports it. Replaced and removed entries leave dead bytes in
+    the pack until ``compact()``.
+    """
+
+    def __init__(self, path, compress=False):
+        self.pack_path = path + ".pack"
+        self.index_path = path + ".idx"
+        self.format = "webp" if compress and features.check("webp") else "raw"
+        self.lock = threading.Lock()
+        self._index = self._load_index()
+        self._pack = open(self.pack_path, "ab+")
+        self._map = None
+        self._pack.seek(0, os.SEEK_END)
+        self.dead_bytes = self._pack.tell() - self.live_bytes()
+
+    def _load_index(self):
+        index = {}
+        try:
+            pack_size = os.path.getsize(self.pack_path)
+            with open(self.index_path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from a crash
+                    if entry.get("deleted"):
+                        index.pop(entry["key"], None)
+                    # Data is written before its index line, but check anyway
+                    elif entry["offset"] + entry["length"] <= pack_size:
+                        index[entry["key"]] = entry
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error reading image archive index: {e}")
+        return index
+
+    def _view(self, end):
+        """Return a memory map covering at least ``end`` bytes, remapping after appends"""
+        if self._map is None or len(self._map) < end:
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._pack.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def keys(self):
+        with self.lock:
+            return list(self._index)
+
+    def size_of(self, key):
+        entry = self._index.get(key)
+        return entry["length"] if entry else 0
+
+    def live_bytes(self):
+        return sum(entry["length"] for entry in self._index.values())
+
+    def _append_index(self, entry):
+        with open(self.index_path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def get(self, key):
+        """Return the PIL image stored under key, or None"""
+        with self.lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            end = entry["offset"] + entry["length"]
+            data = self._view(end)[entry["offset"]:end]
+        if entry["format"] == "raw":
+            return Image.frombytes(entry["mode"], (entry["width"], entry["height"]), data)
+        image = Image.open(BytesIO(data))
+        image.load()
+        return image
+
+    def put(self, key, pil_image):
+        """Append an image to the archive; a later put for the same key replaces it"""
+        if pil_image.mode not in ("RGB", "RGBA"):
+            pil_image = pil_image.convert("RGBA")
+        if self.format == "raw":
+            data = pil_image.tobytes()
+        else:
+            buffer = BytesIO()
+            pil_image.save(buffer, format="WEBP", lossless=True)
+            data = buffer.getvalue()
+        with self.lock:
+            self._pack.seek(0, os.SEEK_END)
+            offset = self._pack.tell()
+            self._pack.write(data)
+            self._pack.flush()
+            entry = {
+                "key": key,
+                "offset": offset,
+                "length": len(data),
+                "format": self.format,
+                "mode": pil_image.mode,
+                "width": pil_image.width,
+                "height": pil_image.height,
+            }
+            self._append_index(entry)
+            if key in self._index:
+                self.dead_bytes += self._index[key]["length"]
+            self._index[key] = entry
+
+    def remove(self, key):
+        with self.lock:
+            entry = self._index.pop(key, None)
+            if entry is not None:
+                self._append_index({"key": key, "deleted": True})
+                self.dead_bytes += entry["length"]
+
+    def compact(self):
+        """Rewrite the pack and index with only live entries, reclaiming dead bytes"""
+        with self.lock:
+            tmp_pack = self.pack_path + ".tmp"
+            tmp_index = self.index_path + ".tmp"
+            index = {}
+            with open(tmp_pack, "wb") as pack, open(tmp_index, "w") as index_file:
+                for key, entry in self._index.items():
+                    end = entry["offset"] + entry["length"]
+                    data = self._view(end)[entry["offset"]:end]
+                    entry = dict(entry, offset=pack.tell())
+                    pack.write(data)
+                    index_file.write(json.dumps(entry) + "\n")
+                    index[key] = entry
+            # Files must be closed before they are replaced on Windows
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._pack.close()
+            os.replace(tmp_pack, self.pack_path)
+            os.replace(tmp_index, self.index_path)
+            self._pack = open(self.pack_path, "ab+")
+            self._index = index
+            self.dead_bytes = 0
+
+    def clear(self):
+        with self.lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._pack.truncate(0)
+            open(self.index_path, "w").close()
+            self._index = {}
+            self.dead_bytes = 0
+
+    def close(self):
+        with self.lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._pack.close()
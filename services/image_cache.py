@@ -2,11 +2,53 @@ import requests
 from PIL import Image
 from io import BytesIO
 import customtkinter
+import hashlib
+import itertools
+import json
+import queue
 import threading
 import time
 import os
+from collections import OrderedDict
 from pathlib import Path
 
+from .image_archive import ImageArchive
+
+# Upper bound on decoded pixel bytes held in the memory tier
+MEMORY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Largest side of the per-url master image that every size is derived from
+MASTER_MAX_SIZE = 480
+
+# Keep thumbnails in one memory-mapped archive instead of a PNG per size
+USE_IMAGE_ARCHIVE = True
+
+# Disk budget for masters and thumbnails; least recently used urls are evicted past it
+DISK_CACHE_MAX_BYTES = 200 * 1024 * 1024
+# Images older than this are revalidated with a conditional GET, and urls
+# unused for this long are dropped at startup (e.g. after an image_url change)
+DISK_CACHE_TTL = 7 * 24 * 60 * 60
+# Manifest changes (new images, access times) are written and the disk budget
+# applied at least this often, so the startup sweep still sees recent use after
+# a kiosk loses power
+MANIFEST_FLUSH_INTERVAL = 60
+# A revalidation that failed (e.g. offline) isn't retried for this long
+REVALIDATE_RETRY_INTERVAL = 15 * 60
+
+# Number of threads downloading images in parallel
+DOWNLOAD_WORKERS = 4
+# Lower numbers are downloaded first
+VISIBLE_PRIORITY = 0  # images on screen right now
+DEFAULT_PRIORITY = 10
+PREFETCH_PRIORITY = 20  # warming the cache ahead of use
+
+# How often the Tk loop applies finished image loads, see attach_tk
+COMPLETION_PUMP_MS = 30
+
+# warm_up hands decoded images to the Tk loop this many at a time, this often
+WARM_UP_BATCH_SIZE = 8
+WARM_UP_INTERVAL_MS = 15
+
 class ImageCache:
     """
     Singleton image cache service that manages both memory and disk caching
@@ -24,59 +66,210 @@ class ImageCache:
         if self._initialized:
             return
             
-        self.memory_cache = {}  # In-memory cache for faster access
+        self.memory_cache = OrderedDict()  # LRU of cache key -> CTkImage, most recently used last
+        self.memory_cache_max_bytes = MEMORY_CACHE_MAX_BYTES
+        self._memory_sizes = {}  # cache key -> decoded bytes
+        self._memory_bytes = 0
+        self._memory_lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0}
         self.disk_cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
                                          "static", "cache")
-        self.background_queue = []  # Queue for background loading
+        self.background_queue = queue.PriorityQueue()  # (priority, seq, url, job) jobs
+        self._seq = itertools.count()  # keeps equal priorities first-in first-out
+        self._pending = {}  # url -> [(size, callback)] waiting on that url's download
+        self._queued_priority = {}  # url -> best priority it is queued at
+        self._in_flight = set()  # urls a worker is loading right now
+        self._revalidating = set()  # urls queued or running a revalidation
+        # (callback, image) pairs waiting for the Tk loop once attach_tk has been called
+        self.completions = queue.SimpleQueue()
+        self._tk_widget = None
+        self.worker_count = DOWNLOAD_WORKERS
         self.is_running = False
         self.lock = threading.Lock()
+
+        # One keep-alive session shared by the workers, with a connection per worker
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=self.worker_count, pool_maxsize=self.worker_count)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         
         # Create cache directory if it doesn't exist
         os.makedirs(self.disk_cache_dir, exist_ok=True)
         print(f"Image cache directory: {self.disk_cache_dir}")
+
+        # Packed thumbnail tier, read with one mmap instead of opening a PNG per hit
+        self.archive = ImageArchive(os.path.join(self.disk_cache_dir, "thumbnails")) if USE_IMAGE_ARCHIVE else None
+
+        # url -> {"master", "master_bytes", "sizes": {"WxH": bytes}, "fetched_at",
+        # "accessed_at", "etag", "last_modified", "revalidate_after"} for everything on disk
+        self.disk_cache_max_bytes = DISK_CACHE_MAX_BYTES
+        self.disk_cache_ttl = DISK_CACHE_TTL
+        self.manifest_path = os.path.join(self.disk_cache_dir, "manifest.json")
+        self._manifest_lock = threading.RLock()
+        self._manifest = self._load_manifest()
+        self._manifest_dirty = False  # changed since the last write
         
         # Start background loading thread
         self._start_background_loader()
+        # The cache is created on the Tk thread; sweeping and compacting happen off it
+        self._stop_maintenance = threading.Event()
+        self._maintenance_thread = threading.Thread(target=self._maintenance_loop, name="image-cache-maintenance",
+                                                    daemon=True)
+        self._maintenance_thread.start()
         self._initialized = True
     
     def _start_background_loader(self):
-        """Start the background thread for loading images"""
+        """Start the pool of threads that download queued images"""
         self.is_running = True
-        self.bg_thread = threading.Thread(target=self._background_loader, daemon=True)
-        self.bg_thread.start()
+        self.bg_threads = []
+        for i in range(self.worker_count):
+            thread = threading.Thread(target=self._background_loader, name=f"image-loader-{i}", daemon=True)
+            thread.start()
+            self.bg_threads.append(thread)
     
     def _background_loader(self):
-        """Background thread that loads images from queue"""
+        """Worker thread that blocks on the queue and loads one url at a time"""
         while self.is_running:
-            try:
-                # Check if there are items in the queue
-                if self.background_queue:
+            _, _, url, job = self.background_queue.get()
+            if url is None:  # shutdown sentinel
+                break
+            if job == "revalidate":
+                try:
+                    self._revalidate(url)
+                except Exception as e:
+                    print(f"Error revalidating {url}: {e}")
+                finally:
                     with self.lock:
-                        # Get an item from the queue if available
-                        if self.background_queue:
-                            url, size, callback = self.background_queue.pop(0)
-                            # Skip if already in memory cache
-                            if self._get_cache_key(url, size) in self.memory_cache:
-                                if callback:
-                                    callback(self.memory_cache[self._get_cache_key(url, size)])
-                                continue
-                    
-                    # Not in memory cache, try to load
-                    try:
-                        print(f"Background loading image: {url}")
-                        image = self._load_and_cache_image(url, size)
-                        if callback and image:
-                            print(f"Image loaded, calling callback for {url}")
-                            callback(image)
-                    except Exception as e:
-                        print(f"Error in background loading of {url}: {e}")
-                
-                # Sleep a bit to avoid consuming too much CPU
-                time.sleep(0.01)
+                        self._revalidating.discard(url)
+                continue
+            with self.lock:
+                # Skip entries left behind by a priority bump or a cancellation
+                if url in self._in_flight or url not in self._pending:
+                    continue
+                self._in_flight.add(url)
+                self._queued_priority.pop(url, None)
+            try:
+                self._load_for_waiters(url)
             except Exception as e:
-                print(f"Error in background loader: {e}")
-                time.sleep(0.1)
+                with self.lock:
+                    self._pending.pop(url, None)
+                    self._in_flight.discard(url)
+                print(f"Error in background loading of {url}: {e}")
+    
+    def _complete(self, callback, image):
+        """Hand a loaded image to its callback, on the Tk loop when a pump is attached"""
+        if self._tk_widget is not None:
+            self.completions.put((callback, image))
+        else:
+            callback(image)
     
+    def attach_tk(self, tk_widget, interval_ms=COMPLETION_PUMP_MS):
+        """
+        Run get_image callbacks on the Tk loop. A single after() pump drains
+        every completed load in one batch per tick, so widgets are only ever
+        touched from the Tk thread.
+        """
+        self._tk_widget = tk_widget
+        
+        def pump():
+            while True:
+                try:
+                    callback, image = self.completions.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    callback(image)
+                except Exception as e:
+                    print(f"Error in image callback: {e}")
+            try:
+                tk_widget.after(interval_ms, pump)
+            except Exception:
+                pass  # window destroyed, stop pumping
+        
+        tk_widget.after(interval_ms, pump)
+    
+    def _queue(self, url, priority):
+        """Queue a url at a priority; call with self.lock held"""
+        self._queued_priority[url] = priority
+        self.background_queue.put((priority, next(self._seq), url, "load"))
+    
+    def _load_for_waiters(self, url):
+        """
+        Serve every size/callback waiting on a url, downloading it at most once.
+        The url stays in _pending until no waiters are left, so requests that
+        arrive mid-download join this one instead of starting another.
+        """
+        master = None
+        while True:
+            with self.lock:
+                waiters = self._pending.get(url)
+                if not waiters:
+                    self._pending.pop(url, None)
+                    self._in_flight.discard(url)
+                    return
+                self._pending[url] = []
+            master = self._serve_waiters(url, waiters, master)
+    
+    def _serve_waiters(self, url, waiters, master):
+        for size, callback in waiters:
+            key = self._get_cache_key(url, size)
+            image = self._memory_get(key) or self._load_from_disk_cache(url, size)
+            if image:
+                self._memory_put(key, image)
+                self._touch(url)
+            else:
+                if master is None:
+                    master = self._load_master(url)
+                    if master is None:
+                        return None
+                image = self._derive(url, size, master)
+            if callback and image:
+                self._complete(callback, image)
+        return master
+    
+    def _memory_get(self, key):
+        """Look up the memory tier, marking the entry as most recently used"""
+        with self._memory_lock:
+            image = self.memory_cache.get(key)
+            if image is None:
+                self._counters["misses"] += 1
+                return None
+            self.memory_cache.move_to_end(key)
+            self._counters["hits"] += 1
+            return image
+
+    def _memory_put(self, key, ctk_image):
+        """Add an image to the memory tier, evicting least recently used entries over the byte limit"""
+        pil_image = ctk_image.cget("light_image")
+        nbytes = pil_image.width * pil_image.height * len(pil_image.getbands())
+        with self._memory_lock:
+            if key in self.memory_cache:
+                self._memory_bytes -= self._memory_sizes[key]
+            self.memory_cache[key] = ctk_image
+            self.memory_cache.move_to_end(key)
+            self._memory_sizes[key] = nbytes
+            self._memory_bytes += nbytes
+            # Always keep the newest entry, even if it alone is over the limit
+            while self._memory_bytes > self.memory_cache_max_bytes and len(self.memory_cache) > 1:
+                old_key, _ = self.memory_cache.popitem(last=False)
+                self._memory_bytes -= self._memory_sizes.pop(old_key)
+                self._counters["evictions"] += 1
+
+    def _memory_discard(self, key):
+        with self._memory_lock:
+            if self.memory_cache.pop(key, None) is not None:
+                self._memory_bytes -= self._memory_sizes.pop(key)
+
+    def stats(self):
+        """Return memory tier usage and hit/miss/eviction counters"""
+        with self._memory_lock:
+            return {
+                "entries": len(self.memory_cache),
+                "bytes": self._memory_bytes,
+                "max_bytes": self.memory_cache_max_bytes,
+                **self._counters,
+            }
+
     def _get_cache_key(self, url, size):
         """Generate a unique key for the cache based on URL and size"""
         return f"{url}_{size[0]}x{size[1]}"
@@ -84,41 +277,345 @@ class ImageCache:
     def _get_disk_cache_path(self, url, size):
         """Generate a filepath for disk caching"""
         # Create a filename from the URL using a hash to avoid file system issues
-        import hashlib
         filename = hashlib.md5(url.encode()).hexdigest()
         return os.path.join(self.disk_cache_dir, f"{filename}_{size[0]}x{size[1]}.png")
     
-    def _load_from_disk_cache(self, url, size):
-        """Try to load image from disk cache"""
+    def _get_master_path(self, url):
+        return os.path.join(self.disk_cache_dir, f"{hashlib.md5(url.encode()).hexdigest()}_master.png")
+    
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Error reading image cache manifest: {e}")
+            return {}
+        for entry in manifest.values():
+            # Older manifests kept a plain list of sizes
+            if isinstance(entry.get("sizes"), list):
+                entry["sizes"] = {size_name: 0 for size_name in entry["sizes"]}
+            entry.setdefault("accessed_at", time.time())
+        return manifest
+    
+    def _write_manifest(self):
+        """Persist the manifest; call with _manifest_lock held"""
+        try:
+            # Write a temp file then rename so a crash never leaves half a manifest
+            tmp_path = self.manifest_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._manifest, f)
+            os.replace(tmp_path, self.manifest_path)
+            self._manifest_dirty = False
+        except Exception as e:
+            print(f"Error saving image cache manifest: {e}")
+    
+    def _record_manifest(self, url, size=None, size_bytes=0, **fields):
+        """
+        Note a url's master details, and optionally a derived size, in the
+        manifest. The maintenance thread writes it and applies the disk budget.
+        """
+        with self._manifest_lock:
+            entry = self._manifest.setdefault(url, {
+                "master": os.path.basename(self._get_master_path(url)),
+                "master_bytes": 0,
+                "sizes": {},
+                "fetched_at": time.time(),
+            })
+            entry.update(fields)
+            entry["accessed_at"] = time.time()
+            if size:
+                entry["sizes"][f"{size[0]}x{size[1]}"] = size_bytes
+            self._manifest_dirty = True
+    
+    def _touch(self, url):
+        """
+        Mark a url as used for LRU eviction (persisted by the maintenance thread
+        within MANIFEST_FLUSH_INTERVAL) and schedule a revalidation if its copy
+        has outlived the TTL.
+        """
+        now = time.time()
+        with self._manifest_lock:
+            entry = self._manifest.get(url)
+            if entry is None:
+                return
+            entry["accessed_at"] = now
+            self._manifest_dirty = True
+            expired = (now - entry.get("fetched_at", 0) > self.disk_cache_ttl
+                       and now >= entry.get("revalidate_after", 0))
+        if expired:
+            with self.lock:
+                if url not in self._revalidating:
+                    self._revalidating.add(url)
+                    self.background_queue.put((PREFETCH_PRIORITY, next(self._seq), url, "revalidate"))
+    
+    def _entry_bytes(self, entry):
+        return entry.get("master_bytes", 0) + sum(entry["sizes"].values())
+    
+    def _delete_entry(self, url):
+        """Remove a url's master and thumbnails from disk; call with _manifest_lock held"""
+        entry = self._manifest.pop(url, None)
+        if entry is None:
+            return
+        paths = [self._get_master_path(url)]
+        for size_name in entry["sizes"]:
+            size = tuple(int(part) for part in size_name.split("x"))
+            key = self._get_cache_key(url, size)
+            paths.append(self._get_disk_cache_path(url, size))
+            if self.archive is not None:
+                self.archive.remove(key)
+            self._memory_discard(key)
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    
+    def _enforce_disk_budget(self):
+        """Evict least recently used urls until the disk cache fits its budget"""
+        with self._manifest_lock:
+            total = sum(self._entry_bytes(entry) for entry in self._manifest.values())
+            if total <= self.disk_cache_max_bytes:
+                return
+            by_last_use = sorted(self._manifest, key=lambda u: self._manifest[u].get("accessed_at", 0))
+            # Never evict the most recently used url, it is likely being written right now
+            for url in by_last_use[:-1]:
+                if total <= self.disk_cache_max_bytes:
+                    break
+                total -= self._entry_bytes(self._manifest[url])
+                print(f"Evicting from disk cache: {url}")
+                self._delete_entry(url)
+            self._write_manifest()
+            self._compact_archive()
+    
+    def _compact_archive(self):
+        # Rewrite the pack once most of it is evicted or replaced images
+        if self.archive is not None and self.archive.dead_bytes > max(self.archive.live_bytes(), 1024 * 1024):
+            self.archive.compact()
+    
+    def _maintenance_loop(self):
+        """Sweep the disk cache once at startup, then persist the manifest and apply the budget periodically"""
+        try:
+            self._sweep_disk_cache()
+        except Exception as e:
+            print(f"Error sweeping image disk cache: {e}")
+        while not self._stop_maintenance.wait(MANIFEST_FLUSH_INTERVAL):
+            try:
+                with self._manifest_lock:
+                    if self._manifest_dirty:
+                        self._write_manifest()
+                        self._enforce_disk_budget()
+            except Exception as e:
+                print(f"Error maintaining image disk cache: {e}")
+    
+    def _sweep_disk_cache(self):
+        """Drop urls nobody has used within the TTL, then apply the size budget"""
+        # A use in the last flush interval may not have reached the manifest yet,
+        # and a revalidation (fetched_at) also counts as use
+        cutoff = time.time() - self.disk_cache_ttl - MANIFEST_FLUSH_INTERVAL
+        with self._manifest_lock:
+            unused = [url for url, entry in self._manifest.items()
+                      if max(entry.get("accessed_at", 0), entry.get("fetched_at", 0)) < cutoff]
+            for url in unused:
+                self._delete_entry(url)
+            if unused:
+                print(f"Dropped {len(unused)} unused images from disk cache")
+                self._write_manifest()
+            self._sweep_unclaimed_files(cutoff)
+            self._sweep_unclaimed_archive_entries()
+            self._enforce_disk_budget()
+            self._compact_archive()
+    
+    def _sweep_unclaimed_files(self, cutoff):
+        """
+        Remove PNGs no manifest entry claims, e.g. thumbnails from before the
+        manifest for urls no longer on the menu, once their file is older than
+        the TTL, or oldest first while the disk cache is over budget. Ones still
+        in use are adopted on their next hit. Call with _manifest_lock held.
+        """
+        claimed = {hashlib.md5(url.encode()).hexdigest() for url in self._manifest}
+        unclaimed = []
+        for file in os.scandir(self.disk_cache_dir):
+            if file.name.endswith(".png") and file.name.split("_", 1)[0] not in claimed:
+                stat = file.stat()
+                unclaimed.append((stat.st_mtime, stat.st_size, file.path))
+        total = (sum(self._entry_bytes(entry) for entry in self._manifest.values())
+                 + sum(size_bytes for _, size_bytes, _ in unclaimed))
+        removed = 0
+        for mtime, size_bytes, path in sorted(unclaimed):
+            if mtime >= cutoff and total <= self.disk_cache_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size_bytes
+            removed += 1
+        if removed:
+            print(f"Dropped {removed} unclaimed files from disk cache")
+    
+    def _sweep_unclaimed_archive_entries(self):
+        """
+        Remove thumbnails the manifest doesn't list, left when the kiosk stopped
+        before the manifest recording them was written. Call with _manifest_lock held.
+        """
+        if self.archive is None:
+            return
+        claimed = {f"{url}_{size_name}" for url, entry in self._manifest.items() for size_name in entry["sizes"]}
+        unclaimed = [key for key in self.archive.keys() if key not in claimed]
+        for key in unclaimed:
+            self.archive.remove(key)
+        if unclaimed:
+            print(f"Dropped {len(unclaimed)} unclaimed thumbnails from image archive")
+    
+    def _load_master(self, url):
+        """
+        Return the master image for a url, from disk if we have it, otherwise
+        downloaded once and shrunk to MASTER_MAX_SIZE. Every size is derived
+        from it, so a new size never costs another download.
+        """
+        master_path = self._get_master_path(url)
+        if os.path.exists(master_path):
+            try:
+                master = Image.open(master_path)
+                master.load()
+                return master
+            except Exception as e:
+                print(f"Error loading master image: {e}")
+        response = self._download(url)
+        if response is None:
+            return None
+        return self._store_master(url, response)
+    
+    def _store_master(self, url, response):
+        """Decode a downloaded image, save it as the url's master and record its validators"""
+        try:
+            master = Image.open(BytesIO(response.content))
+            master.load()
+            print(f"Downloaded image: {url}, size: {master.size}")
+        except Exception as e:
+            print(f"Error decoding image from URL {url}: {e}")
+            return None
+        if master.mode not in ("RGB", "RGBA"):
+            master = master.convert("RGBA")
+        master.thumbnail((MASTER_MAX_SIZE, MASTER_MAX_SIZE), Image.LANCZOS)
+        master_path = self._get_master_path(url)
+        try:
+            master.save(master_path, format="PNG")
+            self._record_manifest(
+                url,
+                master_bytes=os.path.getsize(master_path),
+                fetched_at=time.time(),
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        except Exception as e:
+            print(f"Error saving master image: {e}")
+        return master
+    
+    def _revalidate(self, url):
+        """
+        Check an expired url with a conditional GET. A 304 just renews it; a new
+        image replaces the master and is re-derived at every cached size.
+        """
+        entry = self._manifest.get(url)
+        if entry is None:
+            return
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        response = self._download(url, headers)
+        master = None
+        if response is not None and response.status_code == 304:
+            print(f"Image not modified: {url}")
+            self._record_manifest(url, fetched_at=time.time())
+            return
+        if response is not None:
+            master = self._store_master(url, response)
+        if master is None:
+            # Keep serving the old copy, and don't retry on every access while offline
+            with self._manifest_lock:
+                if url in self._manifest:
+                    self._manifest[url]["revalidate_after"] = time.time() + REVALIDATE_RETRY_INTERVAL
+                    self._manifest_dirty = True
+            return
+        for size_name in list(entry["sizes"]):
+            size = tuple(int(part) for part in size_name.split("x"))
+            self._memory_discard(self._get_cache_key(url, size))
+            self._derive(url, size, master)
+    
+    def _decode_from_disk(self, url, size):
+        """Read and decode a cached thumbnail into a PIL image, or None"""
+        if self.archive is not None:
+            try:
+                pil_image = self.archive.get(self._get_cache_key(url, size))
+                if pil_image:
+                    return pil_image
+            except Exception as e:
+                print(f"Error loading from image archive: {e}")
         cache_path = self._get_disk_cache_path(url, size)
         if os.path.exists(cache_path):
             try:
                 pil_image = Image.open(cache_path)
-                ctk_image = customtkinter.CTkImage(pil_image, size=size)
+                pil_image.load()
                 print(f"Loaded from disk cache: {url}")
-                return ctk_image
             except Exception as e:
                 print(f"Error loading from disk cache: {e}")
+                return None
+            self._adopt_disk_file(url, size, pil_image, cache_path)
+            return pil_image
+        return None
+    
+    def _adopt_disk_file(self, url, size, pil_image, cache_path):
+        """
+        Bring a thumbnail PNG written before the archive and manifest existed
+        under the cache: it moves into the archive (when one is used) and
+        counts toward the disk budget and TTL from then on.
+        """
+        with self._manifest_lock:
+            entry = self._manifest.get(url)
+            if self.archive is None and entry is not None and f"{size[0]}x{size[1]}" in entry["sizes"]:
+                return
+            try:
+                # A new entry is as old as the file, so a stale image still gets revalidated
+                fields = {} if entry is not None else {"fetched_at": os.path.getmtime(cache_path)}
+                if self.archive is not None:
+                    key = self._get_cache_key(url, size)
+                    self.archive.put(key, pil_image)
+                    size_bytes = self.archive.size_of(key)
+                    os.remove(cache_path)
+                else:
+                    size_bytes = os.path.getsize(cache_path)
+                self._record_manifest(url, size, size_bytes, **fields)
+            except Exception as e:
+                print(f"Error adopting cached image {cache_path}: {e}")
+    
+    def _load_from_disk_cache(self, url, size):
+        """Try to load image from disk cache"""
+        pil_image = self._decode_from_disk(url, size)
+        if pil_image:
+            return customtkinter.CTkImage(pil_image, size=size)
         return None
     
     def _save_to_disk_cache(self, url, size, pil_image):
-        """Save image to disk cache"""
+        """Save image to disk cache and return the bytes it takes up"""
         try:
+            if self.archive is not None:
+                self.archive.put(self._get_cache_key(url, size), pil_image)
+                return self.archive.size_of(self._get_cache_key(url, size))
             cache_path = self._get_disk_cache_path(url, size)
             pil_image.save(cache_path, format="PNG")
             print(f"Saved to disk cache: {url}")
+            return os.path.getsize(cache_path)
         except Exception as e:
             print(f"Error saving to disk cache: {e}")
+            return 0
     
-    def _load_and_cache_image(self, url, size):
-        """Load an image from URL, cache it, and return CTkImage"""
-        # Check disk cache first
-        ctk_image = self._load_from_disk_cache(url, size)
-        if ctk_image:
-            self.memory_cache[self._get_cache_key(url, size)] = ctk_image
-            return ctk_image
-            
-        # Not in disk cache, download it
+    def _download(self, url, headers=None):
+        """Fetch an image url and return the 200 or 304 response, or None on failure"""
         try:
             # Add a lower-quality parameter to the URL for faster loading if it's from Unsplash
             modified_url = url
@@ -127,14 +624,18 @@ class ImageCache:
                 modified_url = url.replace("q=80", "q=60").replace("w=1080", "w=600")
                 
             print(f"Downloading image: {modified_url}")
-            response = requests.get(modified_url, timeout=5)
-            if response.status_code != 200:
+            response = self.session.get(modified_url, headers=headers, timeout=5)
+            if response.status_code not in (200, 304):
                 print(f"Failed to download image: {response.status_code}")
                 return None
-                
-            pil_image = Image.open(BytesIO(response.content))
-            print(f"Downloaded image: {url}, size: {pil_image.size}")
-            
+            return response
+        except Exception as e:
+            print(f"Error loading image from URL {url}: {e}")
+            return None
+    
+    def _derive(self, url, size, pil_image):
+        """Fit a master image to size, cache it in memory and on disk, and return CTkImage"""
+        try:
             # Optimize image size
             if max(pil_image.size) > max(size) * 2:
                 # Resize if the image is much larger than needed
@@ -147,58 +648,166 @@ class ImageCache:
             ctk_image = customtkinter.CTkImage(pil_image, size=size)
             
             # Cache in memory
-            self.memory_cache[self._get_cache_key(url, size)] = ctk_image
+            self._memory_put(self._get_cache_key(url, size), ctk_image)
             
-            # Save to disk cache in the background
-            threading.Thread(target=self._save_to_disk_cache, 
-                            args=(url, size, pil_image), 
-                            daemon=True).start()
+            # Already on a worker thread, so save to disk inline
+            size_bytes = self._save_to_disk_cache(url, size, pil_image)
+            self._record_manifest(url, size, size_bytes)
             
             return ctk_image
         except Exception as e:
-            print(f"Error loading image from URL {url}: {e}")
+            print(f"Error caching image from URL {url}: {e}")
             return None
     
-    def get_image(self, url, size=(120, 120), callback=None, placeholder=None):
+    def get_image(self, url, size=(120, 120), callback=None, placeholder=None, priority=DEFAULT_PRIORITY):
         """
         Get an image from the cache or load it asynchronously.
         Prevents duplicate background loading for the same image and size.
+        Lower priority values are downloaded first.
         """
         cache_key = self._get_cache_key(url, size)
 
         # Check if image is in memory cache
-        if cache_key in self.memory_cache:
-            return self.memory_cache[cache_key]
+        cached = self._memory_get(cache_key)
+        if cached:
+            self._touch(url)
+            return cached
 
         # Check if image is in disk cache
         disk_cached = self._load_from_disk_cache(url, size)
         if disk_cached:
-            self.memory_cache[cache_key] = disk_cached
+            self._memory_put(cache_key, disk_cached)
+            self._touch(url)
             return disk_cached
 
         # Not cached, queue for background loading
         with self.lock:
-            # Prevent duplicate queueing for the same image/size/callback
-            already_queued = any(item[0] == url and item[1] == size and item[2] == callback for item in self.background_queue)
-            if not already_queued:
+            waiters = self._pending.get(url)
+            if waiters is None:
+                # First request for this url, schedule one download
                 print(f"Queuing image for background loading: {url}")
-                self.background_queue.append((url, size, callback))
+                self._pending[url] = [(size, callback)]
+                self._queue(url, priority)
+            else:
+                # Already queued or downloading, just wait on the same download
+                if (size, callback) not in waiters:
+                    waiters.append((size, callback))
+                if url not in self._in_flight and priority < self._queued_priority.get(url, priority):
+                    self._queue(url, priority)
 
         # Return placeholder while loading
         return placeholder
     
+    def warm_up(self, urls, size, tk_widget, on_progress=None, batch_size=WARM_UP_BATCH_SIZE):
+        """
+        Fill the memory cache for urls without blocking the Tk thread.
+        Disk hits are decoded on a background thread and misses go to the
+        download workers; only the CTkImage creation runs on the Tk loop, a
+        few images per tick. on_progress(done, total) is called on the Tk loop.
+        """
+        urls = list(dict.fromkeys(urls))
+        total = len(urls)
+        results = queue.SimpleQueue()  # (url, decoded PIL image or None if already in memory)
+        downloading = []
+        decoder_done = threading.Event()
+        progress = {"done": 0}
+        
+        def decode():
+            for url in urls:
+                key = self._get_cache_key(url, size)
+                if self._memory_get(key):
+                    results.put((url, None))
+                    continue
+                pil_image = self._decode_from_disk(url, size)
+                if pil_image:
+                    results.put((url, pil_image))
+                    continue
+                # Not on disk, let the download pool fetch it behind on-screen images
+                downloading.append(url)
+                image = self.get_image(url, size, lambda image, url=url: results.put((url, None)),
+                                       priority=PREFETCH_PRIORITY)
+                if image:
+                    results.put((url, None))
+            decoder_done.set()
+        
+        def pump():
+            for _ in range(batch_size):
+                try:
+                    url, pil_image = results.get_nowait()
+                except queue.Empty:
+                    break
+                if pil_image is not None:
+                    self._memory_put(self._get_cache_key(url, size), customtkinter.CTkImage(pil_image, size=size))
+                    self._touch(url)
+                progress["done"] += 1
+            if on_progress:
+                on_progress(progress["done"], total)
+            # Finished once nothing is left to decode or download; failed downloads never report.
+            # Checked in the order results flow: pending download, completion queue, results.
+            finished = progress["done"] >= total or (
+                decoder_done.is_set()
+                and not any(url in self._pending for url in downloading)
+                and self.completions.empty() and results.empty())
+            if not finished:
+                try:
+                    tk_widget.after(WARM_UP_INTERVAL_MS, pump)
+                except Exception:
+                    pass  # window closed mid warm-up
+        
+        threading.Thread(target=decode, name="image-warm-up", daemon=True).start()
+        tk_widget.after(WARM_UP_INTERVAL_MS, pump)
+    
+    def prioritize(self, url, priority=VISIBLE_PRIORITY):
+        """Move a queued url ahead of lower priority downloads"""
+        with self.lock:
+            if url in self._pending and url not in self._in_flight \
+                    and priority < self._queued_priority.get(url, priority):
+                self._queue(url, priority)
+    
+    def cancel(self, url, callback):
+        """
+        Drop a pending request made with this callback, e.g. for a widget that
+        was destroyed. The download itself is skipped once nobody waits on it.
+        """
+        with self.lock:
+            waiters = self._pending.get(url)
+            if not waiters:
+                return
+            waiters[:] = [waiter for waiter in waiters if waiter[1] != callback]
+            if not waiters and url not in self._in_flight:
+                del self._pending[url]
+                self._queued_priority.pop(url, None)
+    
     def clear_memory_cache(self):
         """Clear the in-memory cache to free up memory"""
-        self.memory_cache = {}
+        with self._memory_lock:
+            self.memory_cache.clear()
+            self._memory_sizes.clear()
+            self._memory_bytes = 0
     
     def clear_disk_cache(self):
         """Clear the disk cache"""
-        for file in os.listdir(self.disk_cache_dir):
-            if file.endswith('.png'):
-                os.remove(os.path.join(self.disk_cache_dir, file))
+        with self._manifest_lock:
+            for file in os.listdir(self.disk_cache_dir):
+                if file.endswith('.png') or file == "manifest.json":
+                    os.remove(os.path.join(self.disk_cache_dir, file))
+            self._manifest = {}
+        if self.archive is not None:
+            self.archive.clear()
     
     def shutdown(self):
-        """Properly shut down the background thread"""
+        """Properly shut down the background threads"""
         self.is_running = False
-        if hasattr(self, 'bg_thread') and self.bg_thread.is_alive():
-            self.bg_thread.join(timeout=1.0)
\ No newline at end of file
+        self._stop_maintenance.set()
+        # Sentinels sort ahead of any queued download so idle workers wake up and exit
+        for _ in self.bg_threads:
+            self.background_queue.put((float("-inf"), next(self._seq), None, None))
+        for thread in self.bg_threads + [self._maintenance_thread]:
+            if thread.is_alive():
+                thread.join(timeout=1.0)
+        self.session.close()
+        # Keep the access times gathered since the last write for LRU eviction
+        with self._manifest_lock:
+            self._write_manifest()
+        if self.archive is not None:
+            self.archive.close()
\ No newline at end of file
@@ -1,12 +1,17 @@
 from datetime import datetime
 import os
 
+from .pricing import TAX_PERCENT, format_paise, calculate_tax_paise
+
 class InvoiceGenerator:
-    def __init__(self, cart_items, menu_service, special_instructions="", order_id=None):
+    def __init__(self, cart_items, menu_service, special_instructions="", order_id=None, order_items=None):
         self.cart_items = cart_items
         self.menu_service = menu_service
         self.special_instructions = special_instructions
         self.order_id = order_id
+        # Priced lines as sent with the order ({"name", "qty", "price_paise"}); when
+        # given, the invoice uses these instead of the current menu prices
+        self.order_items = order_items
         
         # Ensure the invoices directory exists in static folder
         self.invoices_dir = os.path.join("static", "invoices")
@@ -36,37 +41,42 @@ class InvoiceGenerator:
         items_details = []
         subtotal = 0
         
-        for item_name, quantity in self.cart_items.items():
-            # Find the menu item details
-            menu_item = next((item for item in self.menu_service.get_all_items() 
-                             if item["name"] == item_name), None)
+        for item_name, quantity, price_paise in self._priced_lines():
+            item_total = price_paise * quantity
+            subtotal += item_total
             
-            if menu_item:
-                price_text = menu_item["price"]
-                price_value = float(price_text.replace("₹", ""))
-                item_total = price_value * quantity
-                subtotal += item_total
-                
-                items_details.append({
-                    "name": item_name,
-                    "price": price_value,
-                    "quantity": quantity,
-                    "total": item_total
-                })
+            items_details.append({
+                "name": item_name,
+                "price": price_paise,
+                "quantity": quantity,
+                "total": item_total
+            })
         
-        tax_rate = 0.05
-        tax = subtotal * tax_rate
+        # All amounts are integer paise
+        tax = calculate_tax_paise(subtotal)
         total = subtotal + tax
         
         return {
             "items": items_details,
             "subtotal": subtotal,
-            "tax_rate": tax_rate,
+            "tax_percent": TAX_PERCENT,
             "tax": tax,
             "total": total,
             "special_instructions": self.special_instructions
         }
     
+    def _priced_lines(self):
+        """(name, quantity, price_paise) for every line on the invoice"""
+        if self.order_items is not None:
+            return [(item["name"], item["qty"], item["price_paise"]) for item in self.order_items]
+        lines = []
+        for item_name, quantity in self.cart_items.items():
+            # Find the menu item details
+            menu_item = self.menu_service.get_item(item_name)
+            if menu_item:
+                lines.append((item_name, quantity, menu_item["price_paise"]))
+        return lines
+    
     def _generate_html_invoice(self, data, timestamp, order_id=None):
         """Generate the HTML content for the invoice"""
         invoice_date = datetime.now().strftime("%B %d, %Y %I:%M %p")
@@ -236,9 +246,9 @@ class InvoiceGenerator:
             html += f"""
                 <tr>
                     <td>{item['name']}</td>
-                    <td>₹{item['price']:.2f}</td>
+                    <td>{format_paise(item['price'])}</td>
                     <td>{item['quantity']}</td>
-                    <td>₹{item['total']:.2f}</td>
+                    <td>{format_paise(item['total'])}</td>
                 </tr>"""
         
         # Add summary rows
@@ -247,15 +257,15 @@ class InvoiceGenerator:
             <tfoot>
                 <tr>
                     <td colspan="3" class="text-right">Subtotal:</td>
-                    <td>₹{data['subtotal']:.2f}</td>
+                    <td>{format_paise(data['subtotal'])}</td>
                 </tr>
                 <tr>
-                    <td colspan="3" class="text-right">Tax ({data['tax_rate']*100:.0f}%):</td>
-                    <td>₹{data['tax']:.2f}</td>
+                    <td colspan="3" class="text-right">Tax ({data['tax_percent']}%):</td>
+                    <td>{format_paise(data['tax'])}</td>
                 </tr>
                 <tr class="total-row">
                     <td colspan="3" class="text-right">Total:</td>
-                    <td>₹{data['total']:.2f}</td>
+                    <td>{format_paise(data['total'])}</td>
                 </tr>
             </tfoot>
         </table>
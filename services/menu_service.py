@@ -1,36 +1,77 @@
 import os
 import sqlite3
+import threading
+
+from database.menu_prices import migrate_menu_price_paise, parse_price_paise
+
+from .notifier import ChangeNotifier
+
+MENU_REFRESH_INTERVAL = 5  # seconds between change checks by the background refresher
+MENU_CHANGE_LOG_SIZE = 1000  # change log rows kept for refreshers that fall behind
+
+# Display order for the category filter; categories not listed here follow alphabetically
+CATEGORY_ORDER = ["Breakfast", "Lunch", "Veg", "Non Veg", "Jain", "North Indian", "South Indian", "Chinese", "Drinks", "Dessert"]
+
+class _MenuSnapshot:
+    """
+    A loaded menu and its lookup and category indexes. Built complete before
+    it is published and never changed afterwards, so replacing the snapshot is
+    a single atomic assignment.
+    """
+
+    def __init__(self, items):
+        self.items = items
+        self.items_by_id = {}
+        self.items_by_name = {}
+        self.positions = {}  # item id -> position in items, to keep results in menu order
+        self.category_ids = {}  # category -> set of item ids, for intersecting filters
+        self.category_items = {}  # category -> items in menu order, served as-is for single filters
+        for position, item in enumerate(items):
+            self.items_by_id[item["id"]] = item
+            # Keep the first item if two share a name, matching the old linear search
+            self.items_by_name.setdefault(item["name"], item)
+            self.positions[item["id"]] = position
+            for cat in item["category"]:
+                self.category_ids.setdefault(cat, set()).add(item["id"])
+                self.category_items.setdefault(cat, []).append(item)
+        known = [cat for cat in CATEGORY_ORDER if cat in self.category_ids]
+        others = sorted(cat for cat in self.category_ids if cat not in CATEGORY_ORDER)
+        self.categories = ["All"] + known + others
+
 
 class MenuService:
     def __init__(self):  # Fixed initialization method name
         self.db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database", "canteen.db")
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         self._init_db()
-        self.menu_items = self._load_menu_items_from_db()
-        self.categories = self._extract_categories()
-        self._listeners = []
-        self._next_listener_id = 1
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread = None
+        self._stop_refresh = threading.Event()
+        # Read the change cursor before loading so no change can slip in between
+        self._last_change_id = self._get_last_change_id()
+        self._apply_items(self._load_menu_items_from_db())
+        self.notifier = ChangeNotifier(_merge_diffs, name="menu listener")
 
     def add_listener(self, callback):
         """Add a listener to be notified when the menu changes"""
-        lid = self._next_listener_id
-        self._next_listener_id += 1
-        self._listeners.append((lid, callback))
-        return lid
+        return self.notifier.add_listener(callback)
 
     def remove_listener(self, listener_id):
         """Remove a listener by its ID"""
-        self._listeners = [(lid, cb) for lid, cb in self._listeners if lid != listener_id]
+        self.notifier.remove_listener(listener_id)
 
-    def _notify_listeners(self):
-        """Notify all listeners that the menu has changed"""
-        listeners_copy = self._listeners.copy()
-        for lid, callback in listeners_copy:
-            try:
-                if lid in [l[0] for l in self._listeners]:
-                    callback(self.menu_items)
-            except Exception as e:
-                print(f"Error notifying menu listener {lid}: {e}")
+    def attach_tk(self, tk_widget):
+        """Deliver menu notifications on the Tk loop instead of the refresher thread"""
+        self.notifier.attach_tk(tk_widget)
+
+    def _notify_listeners(self, diff):
+        """
+        Notify all listeners that the menu has changed.
+        Listeners receive a diff dict with "added" and "updated" item lists and
+        "removed" item ids. Diffs that pile up before delivery are merged into
+        one. It may arrive on the refresher thread unless attach_tk was called.
+        """
+        self.notifier.notify(diff)
 
     def _init_db(self):
         conn = sqlite3.connect(self.db_path)
@@ -42,10 +83,33 @@ class MenuService:
                 price TEXT NOT NULL,
                 description TEXT,
                 image_url TEXT,
-                category TEXT
+                category TEXT,
+                price_paise INTEGER
             )
         ''')
         conn.commit()
+        migrate_menu_price_paise(c)
+        conn.commit()
+        # Triggers record which rows changed so running kiosks can refresh just those
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS menu_changes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                item_id INTEGER NOT NULL
+            )
+        ''')
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS menu_items_after_insert AFTER INSERT ON menu_items
+            BEGIN INSERT INTO menu_changes (item_id) VALUES (NEW.id); END
+        ''')
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS menu_items_after_update AFTER UPDATE ON menu_items
+            BEGIN INSERT INTO menu_changes (item_id) VALUES (NEW.id); END
+        ''')
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS menu_items_after_delete AFTER DELETE ON menu_items
+            BEGIN INSERT INTO menu_changes (item_id) VALUES (OLD.id); END
+        ''')
+        conn.commit()
         # Check if table is empty, then populate with initial data
         c.execute('SELECT COUNT(*) FROM menu_items')
         if c.fetchone()[0] == 0:
@@ -107,50 +171,160 @@ class MenuService:
                 ("Kadai Paneer", "₹90", "Cottage cheese cooked with bell peppers", 'https://www.cookwithmanali.com/wp-content/uploads/2017/03/Best-Kadai-Paneer.jpg', "North Indian,Veg"),
             ]
             c.executemany('''
-                INSERT INTO menu_items (name, price, description, image_url, category)
-                VALUES (?, ?, ?, ?, ?)
-            ''', initial_items)
+                INSERT INTO menu_items (name, price, description, image_url, category, price_paise)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [item + (parse_price_paise(item[1]),) for item in initial_items])
             conn.commit()
         conn.close()
 
-    def _load_menu_items_from_db(self):
+    def _get_last_change_id(self):
+        conn = sqlite3.connect(self.db_path)
+        last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM menu_changes').fetchone()[0]
+        conn.close()
+        return last_id
+
+    def _load_menu_items_from_db(self, item_ids=None):
+        """Load all menu items, or only the given ids"""
         conn = sqlite3.connect(self.db_path)
         c = conn.cursor()
-        c.execute('SELECT name, price, description, image_url, category FROM menu_items')
+        query = 'SELECT id, name, price, description, image_url, category, price_paise FROM menu_items'
+        if item_ids is None:
+            c.execute(query)
+        else:
+            item_ids = list(item_ids)
+            c.execute(f'{query} WHERE id IN ({",".join("?" * len(item_ids))}) ORDER BY id', item_ids)
         rows = c.fetchall()
         conn.close()
         items = []
         for row in rows:
-            name, price, description, image_url, category = row
+            item_id, name, price, description, image_url, category, price_paise = row
             categories = [cat.strip() for cat in category.split(",") if cat.strip()]
             items.append({
+                "id": item_id,
                 "name": name,
-                "price": price,
+                "price": price,  # display text, e.g. "₹50"
+                "price_paise": price_paise if price_paise is not None else parse_price_paise(price),
                 "description": description,
                 "image_url": image_url,
                 "category": categories
             })
         return items
 
-    def _extract_categories(self):
-        cats = set()
-        for item in self.menu_items:
-            for cat in item["category"]:
-                cats.add(cat)
-        return ["All"] + sorted(cats)
+    def _apply_items(self, items):
+        """
+        Swap in a new item list together with everything derived from it.
+        Readers on other threads (the Tk loop, the checkout worker) see either
+        the old menu or the new one, never a half-built index.
+        """
+        self._snapshot = _MenuSnapshot(items)
+
+    @property
+    def menu_items(self):
+        return self._snapshot.items
+
+    @property
+    def categories(self):
+        return self._snapshot.categories
+
+    def reload(self):
+        """Reload the whole menu from the database and notify listeners with the diff"""
+        with self._refresh_lock:
+            self._last_change_id = self._get_last_change_id()
+            old_items = self._snapshot.items_by_id
+            items = self._load_menu_items_from_db()
+            new_ids = {item["id"] for item in items}
+            diff = {
+                "added": [item for item in items if item["id"] not in old_items],
+                "updated": [item for item in items if item["id"] in old_items and item != old_items[item["id"]]],
+                "removed": [item_id for item_id in old_items if item_id not in new_ids],
+            }
+            self._apply_items(items)
+        self._notify_listeners(diff)
+        return diff
+
+    def refresh_changes(self):
+        """
+        Apply only the rows changed since the last refresh and notify listeners.
+        Returns the diff, or None when nothing changed.
+        """
+        with self._refresh_lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                rows = conn.execute('SELECT id, item_id FROM menu_changes WHERE id > ? ORDER BY id',
+                                    (self._last_change_id,)).fetchall()
+                oldest = conn.execute('SELECT MIN(id) FROM menu_changes').fetchone()[0]
+                # Keep the change log bounded; refreshers that fell further behind do a full reload
+                conn.execute('DELETE FROM menu_changes WHERE id <= ?', (rows[-1][0] - MENU_CHANGE_LOG_SIZE if rows else 0,))
+                conn.commit()
+            finally:
+                conn.close()
+            if not rows:
+                return None
+            fell_behind = oldest is not None and oldest > self._last_change_id + 1
+            if not fell_behind:
+                self._last_change_id = rows[-1][0]
+                changed_ids = {item_id for _, item_id in rows}
+                fresh = {item["id"]: item for item in self._load_menu_items_from_db(changed_ids)}
+                diff = {"added": [], "updated": [], "removed": []}
+                items = []
+                for item in self.menu_items:
+                    if item["id"] not in changed_ids:
+                        items.append(item)
+                    elif item["id"] in fresh:
+                        items.append(fresh[item["id"]])
+                        diff["updated"].append(fresh[item["id"]])
+                    else:
+                        diff["removed"].append(item["id"])
+                for item_id, item in fresh.items():
+                    if item_id not in self._snapshot.items_by_id:
+                        items.append(item)
+                        diff["added"].append(item)
+                self._apply_items(items)
+        if fell_behind:
+            return self.reload()
+        self._notify_listeners(diff)
+        return diff
+
+    def start_auto_refresh(self, interval=MENU_REFRESH_INTERVAL):
+        """Start a background thread that picks up menu changes made elsewhere (e.g. the admin app)"""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        self._stop_refresh.clear()
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, args=(interval,), daemon=True)
+        self._refresh_thread.start()
+
+    def stop_auto_refresh(self):
+        self._stop_refresh.set()
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            self._refresh_thread.join(timeout=1.0)
+
+    def _refresh_loop(self, interval):
+        # PRAGMA data_version only changes when another connection commits, so it
+        # must be read on one long-lived connection. Checking it costs no table reads.
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        last_version = None  # the first check also catches changes made before the thread started
+        while not self._stop_refresh.wait(interval):
+            try:
+                version = conn.execute('PRAGMA data_version').fetchone()[0]
+                if version != last_version:
+                    last_version = version
+                    self.refresh_changes()
+            except Exception as e:
+                print(f"Error refreshing menu: {e}")
+        conn.close()
 
     def get_categories(self):
-        return  ["All", "Breakfast", "Lunch", "Veg", "Non Veg", "Jain", "North Indian", "South Indian", "Chinese", "Drinks", "Dessert"]
+        return self.categories
 
     def get_items_by_category(self, category):
+        snapshot = self._snapshot
         if category == "All":
-            return self.menu_items
-        return [item for item in self.menu_items if category in item["category"]]
+            return snapshot.items
+        return snapshot.category_items.get(category, [])
         
     def get_items_by_food_type(self, food_type):
-        if food_type == "All":
-            return self.menu_items
-        return [item for item in self.menu_items if food_type in item["category"]]
+        # Food types (Veg, Non Veg, Jain) are stored as categories
+        return self.get_items_by_category(food_type)
         
     def get_items_by_category_and_food_type(self, category, food_type):
         if category == "All" and food_type == "All":
@@ -159,8 +333,43 @@ class MenuService:
             return self.get_items_by_food_type(food_type)
         elif food_type == "All":
             return self.get_items_by_category(category)
-        return [item for item in self.menu_items if category in item["category"] and food_type in item["category"]]
+        # One snapshot for the whole lookup so a concurrent reload can't mix two menus
+        snapshot = self._snapshot
+        ids = snapshot.category_ids.get(category, set()) & snapshot.category_ids.get(food_type, set())
+        return [snapshot.items_by_id[item_id] for item_id in sorted(ids, key=snapshot.positions.get)]
 
     def get_all_items(self):
         """Return all menu items."""
-        return self.menu_items
\ No newline at end of file
+        return self.menu_items
+
+    def get_item(self, name):
+        """Return the menu item with this name, or None"""
+        return self._snapshot.items_by_name.get(name)
+
+    def get_item_by_id(self, item_id):
+        """Return the menu item with this id, or None"""
+        return self._snapshot.items_by_id.get(item_id)
+
+
+def _merge_diffs(pending, diff):
+    """Fold a newer menu diff into a pending one, keeping the net change per item"""
+    if pending is None:
+        return diff
+    changes = {}  # item id -> (kind, item)
+    for later in (pending, diff):
+        for item in later["added"]:
+            kind = changes.get(item["id"], (None,))[0]
+            # Removed then added again is an update for whoever saw the first version
+            changes[item["id"]] = ("updated" if kind in ("removed", "updated") else "added", item)
+        for item in later["updated"]:
+            kind = changes.get(item["id"], (None,))[0]
+            changes[item["id"]] = ("added" if kind == "added" else "updated", item)
+        for item_id in later["removed"]:
+            if changes.get(item_id, (None,))[0] == "added":
+                del changes[item_id]  # never seen by listeners
+            else:
+                changes[item_id] = ("removed", item_id)
+    merged = {"added": [], "updated": [], "removed": []}
+    for kind, value in changes.values():
+        merged[kind].append(value)
+    return merged
@@ -0,0 +1,117 @@
+import threading
+from contextlib import contextmanager
+
+NOTIFY_FRAME_MS = 16  # change-sets are delivered at most once per frame once attached to Tk
+
+
+class ChangeNotifier:
+    """
+    Listener registry that coalesces changes into change-sets.
+
+    Each notify(change) is folded into the pending change-set with
+    merge(pending, change); pending is None when nothing is waiting. Listeners
+    get the merged change-set once per batch() (or per notify outside a batch),
+    or once per Tk frame after attach_tk, so a burst of changes costs one
+    redraw. Listeners are kept in a dict so adding, removing and checking them
+    during delivery is O(1).
+    """
+
+    def __init__(self, merge, name="listener"):
+        self.merge = merge
+        self.name = name
+        self.listeners = {}  # listener id -> callback, in registration order
+        self.next_listener_id = 1
+        self._lock = threading.Lock()
+        self._pending = None
+        self._batch_depth = 0
+        self._tk_widget = None
+        self._tk_interval_ms = NOTIFY_FRAME_MS
+        self._flush_scheduled = False  # an after() for the pending change-set is armed
+
+    def add_listener(self, callback):
+        with self._lock:
+            listener_id = self.next_listener_id
+            self.next_listener_id += 1
+            self.listeners[listener_id] = callback
+        return listener_id
+
+    def remove_listener(self, listener_id):
+        with self._lock:
+            self.listeners.pop(listener_id, None)
+
+    def notify(self, change):
+        with self._lock:
+            self._pending = self.merge(self._pending, change)
+            deliver_now = self._batch_depth == 0 and self._tk_widget is None
+        if deliver_now:
+            self.flush()
+        else:
+            self._schedule_tk_flush()
+
+    @contextmanager
+    def batch(self):
+        """Hold back delivery until the outermost batch exits"""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                deliver_now = self._batch_depth == 0 and self._tk_widget is None
+            if deliver_now:
+                self.flush()
+            else:
+                self._schedule_tk_flush()
+
+    def flush(self):
+        """Deliver the pending change-set, if any, to every listener"""
+        with self._lock:
+            if self._pending is None or self._batch_depth:
+                return
+            change, self._pending = self._pending, None
+            listeners = list(self.listeners.items())
+        for listener_id, callback in listeners:
+            try:
+                # Skip listeners removed by an earlier callback in this round
+                if listener_id in self.listeners:
+                    callback(change)
+            except Exception as e:
+                print(f"Error notifying {self.name} {listener_id}: {e}")
+
+    def attach_tk(self, tk_widget, interval_ms=NOTIFY_FRAME_MS):
+        """
+        Deliver change-sets on the Tk loop: changes made within one frame, from
+        any thread, reach listeners as a single change-set. A flush is only
+        scheduled while a change-set is pending, so an idle kiosk has no timer.
+        """
+        with self._lock:
+            self._tk_widget = tk_widget
+            self._tk_interval_ms = interval_ms
+            self._flush_scheduled = True
+        # Changes notified before the Tk loop runs go out on its first frame
+        tk_widget.after(interval_ms, self._tk_flush)
+
+    def _schedule_tk_flush(self):
+        with self._lock:
+            tk_widget = self._tk_widget
+            if tk_widget is None or self._pending is None or self._batch_depth or self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        try:
+            tk_widget.after(self._tk_interval_ms, self._tk_flush)
+        except RuntimeError:
+            # Off the Tk thread before mainloop started; the flush armed by attach_tk sends it
+            with self._lock:
+                self._flush_scheduled = False
+        except Exception:
+            # Window destroyed, go back to delivering directly
+            with self._lock:
+                self._tk_widget = None
+                self._flush_scheduled = False
+            self.flush()
+
+    def _tk_flush(self):
+        with self._lock:
+            self._flush_scheduled = False
+        self.flush()
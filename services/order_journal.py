@@ -0,0 +1,179 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+
+ORDERS_BATCH_URL = "http://127.0.0.1:5000/orders/batch"
+JOURNAL_SYNC_INTERVAL = 10  # seconds between attempts to send journaled orders
+JOURNAL_SYNC_BATCH = 50  # orders per POST /orders/batch
+JOURNAL_SYNC_TIMEOUT = 10
+JOURNAL_KEEP_DAYS = 7  # synced orders are kept this long for reference
+JOURNAL_MAX_ATTEMPTS = 5  # batches the backend rejected (4xx) before their orders are set aside
+
+
+class OrderJournal:
+    """
+    Durable local queue for orders the backend couldn't take.
+
+    Orders are written to their own SQLite file (synchronous=FULL, so a
+    journaled order survives a power cut) with a client-generated idempotency
+    key. A background worker replays pending orders in batches through
+    POST /orders/batch; the backend stores each key once, so an order resent
+    after a lost response is not duplicated. Orders the backend rejects as
+    invalid are set aside (rejected_at and error are set) so they don't block
+    the ones queued behind them; they stay in the file for staff to look at.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database", "order_journal.db")
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._init_db()
+        self._sync_lock = threading.Lock()
+        self._sync_thread = None
+        self._stop_sync = threading.Event()
+        self._wake_sync = threading.Event()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute("PRAGMA synchronous = FULL")
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS pending_orders (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    idempotency_key TEXT NOT NULL UNIQUE,
+                    payload TEXT NOT NULL, -- JSON order as sent to POST /orders
+                    created_at TEXT NOT NULL, -- UTC, same format as the backend's CURRENT_TIMESTAMP
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    order_id INTEGER, -- backend id, set once synced
+                    synced_at TEXT,
+                    rejected_at TEXT, -- set aside after the backend refused it
+                    error TEXT
+                )
+            ''')
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(pending_orders)')]
+            if 'rejected_at' not in columns:
+                conn.execute('ALTER TABLE pending_orders ADD COLUMN rejected_at TEXT')
+                conn.execute('ALTER TABLE pending_orders ADD COLUMN error TEXT')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_pending_orders_order_id ON pending_orders (order_id, id)')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def append(self, order_data, idempotency_key=None):
+        """Journal an order for later delivery and return its idempotency key"""
+        key = idempotency_key or uuid.uuid4().hex
+        created_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        conn = self._connect()
+        try:
+            conn.execute('INSERT OR IGNORE INTO pending_orders (idempotency_key, payload, created_at) VALUES (?, ?, ?)',
+                         (key, json.dumps(order_data), created_at))
+            conn.commit()
+        finally:
+            conn.close()
+        self._wake_sync.set()
+        return key
+
+    def pending_count(self):
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT COUNT(*) FROM pending_orders WHERE order_id IS NULL AND rejected_at IS NULL'
+                                ).fetchone()[0]
+        finally:
+            conn.close()
+
+    def sync_once(self, batch_size=JOURNAL_SYNC_BATCH):
+        """
+        Send one batch of pending orders to the backend.
+        Returns the number of orders synced or set aside; raises if the backend
+        can't be reached or fails.
+        """
+        with self._sync_lock:
+            conn = self._connect()
+            try:
+                rows = conn.execute('''
+                    SELECT idempotency_key, payload, created_at, attempts FROM pending_orders
+                    WHERE order_id IS NULL AND rejected_at IS NULL ORDER BY id LIMIT ?
+                ''', (batch_size,)).fetchall()
+                if not rows:
+                    return 0
+                # Only now, so a kiosk with nothing to send never loads requests
+                import requests
+
+                orders = [dict(json.loads(payload), idempotency_key=key, created_at=created_at)
+                          for key, payload, created_at, _ in rows]
+                response = requests.post(ORDERS_BATCH_URL, json={"orders": orders}, timeout=JOURNAL_SYNC_TIMEOUT)
+                now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+                if 400 <= response.status_code < 500:
+                    return self._set_aside_rejected(conn, rows, response, now)
+                if response.status_code != 201:
+                    raise RuntimeError(f"backend returned {response.status_code}: {response.text}")
+                results = response.json().get("orders", [])
+                conn.executemany('UPDATE pending_orders SET order_id = ?, synced_at = ? WHERE idempotency_key = ?',
+                                 [(result["order_id"], now, result["idempotency_key"]) for result in results])
+                conn.execute("DELETE FROM pending_orders WHERE synced_at < datetime('now', ?)",
+                             (f"-{JOURNAL_KEEP_DAYS} days",))
+                conn.commit()
+                return len(results)
+            finally:
+                conn.close()
+
+    def _set_aside_rejected(self, conn, rows, response, now):
+        """
+        Handle a 4xx for a batch. Orders the backend names as invalid are set
+        aside at once; otherwise every order in the batch uses up an attempt
+        and those out of attempts are set aside.
+        """
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        error = str(body.get("message") or response.text)[:500]
+        invalid = [index for index in body.get("invalid", []) if isinstance(index, int) and 0 <= index < len(rows)]
+        if invalid:
+            rejected = [rows[index][0] for index in invalid]
+        else:
+            conn.executemany('UPDATE pending_orders SET attempts = attempts + 1 WHERE idempotency_key = ?',
+                             [(key,) for key, _, _, _ in rows])
+            rejected = [key for key, _, _, attempts in rows if attempts + 1 >= JOURNAL_MAX_ATTEMPTS]
+        conn.executemany('UPDATE pending_orders SET rejected_at = ?, error = ? WHERE idempotency_key = ?',
+                         [(now, error, key) for key in rejected])
+        conn.commit()
+        if rejected:
+            print(f"Set aside {len(rejected)} journaled orders the backend rejected: {error}")
+        else:
+            print(f"Backend rejected journaled orders ({response.status_code}): {error}")
+        return len(rejected)
+
+    def start_sync(self, interval=JOURNAL_SYNC_INTERVAL):
+        """Start the background worker that sends journaled orders once the backend is reachable"""
+        if self._sync_thread and self._sync_thread.is_alive():
+            return
+        self._stop_sync.clear()
+        self._sync_thread = threading.Thread(target=self._sync_loop, args=(interval,), daemon=True)
+        self._sync_thread.start()
+
+    def stop_sync(self):
+        self._stop_sync.set()
+        self._wake_sync.set()
+        if self._sync_thread and self._sync_thread.is_alive():
+            self._sync_thread.join(timeout=1.0)
+
+    def _sync_loop(self, interval):
+        # Orders left over from an earlier run are sent right away
+        while not self._stop_sync.is_set():
+            try:
+                # Keep going while batches make progress, then wait for the next tick
+                while not self._stop_sync.is_set() and self.sync_once():
+                    pass
+            except Exception as e:
+                print(f"Error syncing journaled orders: {e}")
+            self._wake_sync.wait(interval)
+            self._wake_sync.clear()
@@ -0,0 +1,17 @@
+# Shared with the backend, which writes the same menu_items table
+from database.menu_prices import parse_price_paise
+
+# Prices are handled as integer paise so totals are exact
+TAX_PERCENT = 5
+
+
+def format_paise(paise):
+    """Format integer paise for display, e.g. 5050 becomes ₹50.50"""
+    sign = "-" if paise < 0 else ""
+    paise = abs(paise)
+    return f"{sign}₹{paise // 100}.{paise % 100:02d}"
+
+
+def calculate_tax_paise(subtotal_paise):
+    """Tax on a subtotal, rounded half up to the nearest paisa"""
+    return (subtotal_paise * TAX_PERCENT + 50) // 100